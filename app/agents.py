@@ -0,0 +1,66 @@
+"""Process-wide agent instances shared by the sync and async routes."""
+from .config import settings
+from .services.prompt_agent import PromptAgent
+from .services.evaluator import Evaluator
+from .services.rl_agent import RLAgent
+from .services.learning_memory import LearningMemory, DBLearningMemory
+from .services.convergence import ConvergenceMonitor
+from .services.write_behind import WriteBehindQueue
+from .services.report_cache import ReportCache, MemoryReportCacheBackend, RedisReportCacheBackend
+from .services.cache import LRUCache, CachedAgent, prompt_key, spec_key
+
+generator = PromptAgent()
+evaluator = Evaluator()
+if settings.CACHE_ENABLED:
+    generator = CachedAgent(generator, LRUCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS), key=prompt_key)
+    if settings.CACHE_EVALUATOR:
+        evaluator = CachedAgent(evaluator, LRUCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS), key=spec_key)
+
+if settings.RL_MEMORY_BACKEND == "db":
+    from .database import SessionLocal
+    memory = DBLearningMemory(SessionLocal, maxsize=settings.RL_MEMORY_MAX_ENTRIES)
+elif settings.RL_MEMORY_BACKEND == "memory":
+    memory = LearningMemory(maxsize=settings.RL_MEMORY_MAX_ENTRIES)
+else:
+    raise ValueError(f"Invalid RL_MEMORY_BACKEND: {settings.RL_MEMORY_BACKEND}")
+
+beam_pool = None
+if settings.RL_BEAM_PROCESSES > 0:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    # spawn, not fork: the server process is multi-threaded
+    beam_pool = ProcessPoolExecutor(settings.RL_BEAM_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+rl = RLAgent(generator=generator, evaluator=evaluator, memory=memory,
+             beam_candidates=settings.RL_BEAM_CANDIDATES, pool=beam_pool,
+             pool_min_candidates=settings.RL_BEAM_PROCESS_MIN_CANDIDATES)
+
+write_behind = None
+if settings.WRITE_BEHIND:
+    from .database import SessionLocal
+    write_behind = WriteBehindQueue(SessionLocal, maxsize=settings.WRITE_BEHIND_MAX_QUEUE,
+                                    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+                                    flush_ms=settings.WRITE_BEHIND_FLUSH_MS,
+                                    put_timeout=settings.WRITE_BEHIND_PUT_TIMEOUT)
+
+report_cache = None
+if settings.REPORT_CACHE_ENABLED:
+    if settings.REPORT_CACHE_BACKEND == "memory":
+        backend = MemoryReportCacheBackend(settings.REPORT_CACHE_MAX_ENTRIES, ttl=settings.REPORT_CACHE_TTL_SECONDS)
+    elif settings.REPORT_CACHE_BACKEND == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("REPORT_CACHE_BACKEND=redis needs the redis client (pip install redis)")
+        backend = RedisReportCacheBackend(redis.Redis.from_url(settings.REPORT_CACHE_REDIS_URL),
+                                          ttl=settings.REPORT_CACHE_TTL_SECONDS)
+    else:
+        raise ValueError(f"Invalid REPORT_CACHE_BACKEND: {settings.REPORT_CACHE_BACKEND}")
+    report_cache = ReportCache(backend)
+    from . import crud
+    crud.on_report_change(report_cache.invalidate)
+
+
+def convergence_monitor() -> ConvergenceMonitor:
+    """A fresh monitor (they are per run) with the configured thresholds."""
+    return ConvergenceMonitor(target_score=settings.RL_TARGET_SCORE, epsilon=settings.RL_MIN_IMPROVEMENT,
+                              patience=settings.RL_PATIENCE)
@@ -0,0 +1,173 @@
+"""`async def` versions of the core endpoints, mounted in place of the sync
+ones when settings.ASYNC_DB is on. Database waits then yield the event loop
+instead of holding one of Starlette's threadpool slots.
+
+The agents are pure CPU work measured in microseconds, so they run inline.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from .database import get_async_db
+from .config import settings
+from . import async_crud, crud
+from .schemas import (
+    PromptIn, GenerateOut, EvaluateIn, EvaluateOut,
+    IterateIn, IterateOut,
+    HIDGIn, HIDGOut, ReportOut
+)
+from .agents import generator, evaluator, rl, convergence_monitor, write_behind, report_cache
+from .services.write_behind import WriteBehindFull
+from .serializers import parse_sections, report_to_dict, fast_json, report_body, report_response
+
+router = APIRouter()
+
+async def report_cache_call(method, *args):
+    """Call a report_cache method without blocking the event loop on a
+    network backend."""
+    if report_cache.backend.blocking:
+        return await run_in_threadpool(method, *args)
+    return method(*args)
+
+@router.post("/generate", response_model=GenerateOut, summary="Input prompt → JSON spec")
+async def generate(payload: PromptIn, db: AsyncSession = Depends(get_async_db)):
+    if not payload.prompt or not payload.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+    if len(payload.prompt) > 5000:
+        raise HTTPException(status_code=400, detail="Prompt too long (max 5000 chars)")
+
+    prompt = payload.prompt.strip()
+    try:
+        h = crud.prompt_hash(prompt) if settings.DEDUP_REPORTS else None
+        if h:
+            existing = (await async_crud.get_reports_by_prompt_hash(db, [h])).get(h)
+            if existing:
+                return {"id": existing[0], "json_spec": existing[1], "deduplicated": True}
+
+        spec = generator.run(prompt)
+        if not spec or not isinstance(spec, dict):
+            raise ValueError("Invalid JSON spec generated")
+        try:
+            report = await async_crud.create_report(db, prompt_text=prompt, json_spec=spec, prompt_hash=h)
+        except IntegrityError:
+            # a concurrent request stored the same prompt first
+            existing = (await async_crud.get_reports_by_prompt_hash(db, [h])).get(h) if h else None
+            if not existing:
+                raise
+            return {"id": existing[0], "json_spec": existing[1], "deduplicated": True}
+        return {"id": report.id, "json_spec": spec}
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
+
+@router.post("/evaluate", response_model=EvaluateOut, summary="Evaluate a JSON spec")
+async def evaluate(payload: EvaluateIn, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if payload.report_id:
+            rpt = await async_crud.get_report(db, payload.report_id, sections=("json_spec",))
+            if not rpt:
+                raise HTTPException(status_code=404, detail="Report not found")
+            spec = rpt.json_spec
+        elif payload.json_spec:
+            spec = payload.json_spec
+        else:
+            raise HTTPException(status_code=400, detail="Provide report_id or json_spec")
+
+        res = evaluator.run(spec)
+        if payload.report_id:
+            if write_behind is not None:
+                # a full queue blocks the producer: keep that off the event loop
+                await run_in_threadpool(write_behind.add_evaluation, payload.report_id, res["score"], res["comments"])
+            else:
+                await async_crud.add_evaluation(db, payload.report_id, res["score"], res["comments"])
+        return {"score": res["score"], "comments": res["comments"]}
+    except HTTPException:
+        raise
+    except WriteBehindFull:
+        raise HTTPException(status_code=503, detail="Evaluation queue is full, retry later")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
+
+@router.post("/iterate", response_model=IterateOut, summary="Iterative improvement loop with genuine RL learning")
+async def iterate(payload: IterateIn, db: AsyncSession = Depends(get_async_db)):
+    if not payload.prompt or not payload.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+    if payload.max_iters < 1 or payload.max_iters > 10:
+        raise HTTPException(status_code=400, detail="max_iters must be between 1 and 10")
+
+    try:
+        spec = generator.run(payload.prompt.strip())
+        if not spec or not isinstance(spec, dict):
+            raise ValueError("Invalid JSON spec generated")
+        monitor = convergence_monitor() if payload.early_stop else None
+        if payload.beam_width > 1:
+            # a beam round scores many candidates: keep it off the event loop
+            history = await run_in_threadpool(rl.run_from_spec, spec, max_iters=payload.max_iters,
+                                              beam_width=payload.beam_width, monitor=monitor)
+        else:
+            history = rl.run_from_spec(spec, max_iters=payload.max_iters, monitor=monitor)
+        if not history:
+            raise ValueError("No iterations generated")
+
+        report_id = await async_crud.create_report_with_history(db, payload.prompt.strip(), spec, history)
+        return fast_json({
+            "report_id": report_id,
+            "iterations": history,
+            "stop_reason": monitor.stop_reason if monitor else "max_iters",
+        })
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Iteration failed: {str(e)}")
+
+@router.get("/reports/{report_id}", response_model=ReportOut, response_model_exclude_unset=True,
+            summary="Fetch a full report with history")
+async def get_report(report_id: str, include: Optional[str] = None, exclude: Optional[str] = None,
+                     if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    sections = parse_sections(include, exclude)
+    try:
+        cached = await report_cache_call(report_cache.get, report_id, sections) if report_cache else None
+        if cached:
+            body, etag = cached
+            return report_response(body, if_none_match, etag=etag)
+        generation = report_cache.generation() if report_cache else None
+        rpt = await async_crud.get_report(db, report_id, sections=sections)
+        if not rpt:
+            raise HTTPException(status_code=404, detail="Report not found")
+        body = report_body(report_to_dict(rpt, sections))
+        if report_cache:
+            await report_cache_call(report_cache.set, report_id, sections, body, generation)
+        return report_response(body, if_none_match)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch report: {str(e)}")
+
+@router.post("/log-values", response_model=HIDGOut, summary="Store daily Honesty/Integrity/Discipline/Gratitude")
+async def log_values(payload: HIDGIn, db: AsyncSession = Depends(get_async_db)):
+    for field, value in [("honesty", payload.honesty), ("integrity", payload.integrity),
+                         ("discipline", payload.discipline), ("gratitude", payload.gratitude)]:
+        if not value or not value.strip():
+            raise HTTPException(status_code=400, detail=f"{field} cannot be empty")
+        if len(value.strip()) < 10:
+            raise HTTPException(status_code=400, detail=f"{field} must be at least 10 characters for meaningful reflection")
+        if len(value) > 1000:
+            raise HTTPException(status_code=400, detail=f"{field} too long (max 1000 chars)")
+
+    try:
+        v = await async_crud.log_hidg(db, payload.honesty.strip(), payload.integrity.strip(),
+                                      payload.discipline.strip(), payload.gratitude.strip())
+        return {"id": v.id, "message": "Daily values logged successfully"}
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to log values: {str(e)}")
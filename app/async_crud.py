@@ -0,0 +1,72 @@
+"""asyncio counterparts of the `crud` functions used by the async routes.
+
+Statements and row construction are shared with `crud`; only execution differs.
+"""
+from datetime import datetime
+from typing import Union, List, Iterable, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, crud
+
+async def create_report(db: AsyncSession, prompt_text: str, json_spec: dict, prompt_hash: Optional[str] = None) -> models.Report:
+    try:
+        r = models.Report(id=models.gen_uuid(), prompt_text=prompt_text, json_spec=json_spec, prompt_hash=prompt_hash)
+        db.add(r)
+        await db.commit()
+        return r
+    except Exception:
+        await db.rollback()
+        raise
+
+async def get_reports_by_prompt_hash(db: AsyncSession, hashes: Iterable[str]) -> dict:
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    rows = await db.execute(crud.prompt_hash_select(hashes))
+    return {h: (report_id, spec) for h, report_id, spec in rows}
+
+async def get_report(db: AsyncSession, report_id: str, sections: Union[Iterable[str], None] = None) -> Union[models.Report, None]:
+    # lazy loads are unavailable under asyncio, so every section is eager
+    stmt = (
+        select(models.Report)
+        .where(models.Report.id == report_id)
+        .options(*crud.report_load_options(crud.REPORT_SECTIONS if sections is None else sections))
+    )
+    return (await db.execute(stmt)).scalars().first()
+
+async def add_evaluation(db: AsyncSession, report_id: str, score: float, comments: str) -> models.Evaluation:
+    try:
+        e = models.Evaluation(report_id=report_id, score=score, comments=comments)
+        db.add(e)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    # listeners may call a network cache; keep them off the event loop
+    await run_in_threadpool(crud.reports_changed, [report_id])
+    return e
+
+async def create_report_with_history(db: AsyncSession, prompt_text: str, json_spec: dict, history: List[dict]) -> str:
+    report_id, rows, blobs = crud.report_with_history_rows(prompt_text, json_spec, history)
+    try:
+        if blobs:
+            await db.run_sync(crud.store_spec_blobs, blobs)
+        db.add_all(rows)
+        await db.commit()
+        return report_id
+    except Exception:
+        await db.rollback()
+        raise
+
+async def log_hidg(db: AsyncSession, honesty: str, integrity: str, discipline: str, gratitude: str) -> models.HIDGValue:
+    try:
+        v = models.HIDGValue(id=models.gen_uuid(), honesty=honesty, integrity=integrity, discipline=discipline,
+                             gratitude=gratitude, created_at=datetime.utcnow())
+        db.add(v)
+        await db.run_sync(crud.add_to_hidg_rollup, crud.hidg_rollup_values(v))
+        await db.commit()
+        return v
+    except Exception:
+        await db.rollback()
+        raise
@@ -4,6 +4,75 @@ class Settings(BaseSettings):
     APP_NAME: str = "Prompt→JSON Agent Backend"
     DEBUG: bool = True
     DATABASE_URL: str = "sqlite:///./app.db"
+    # Serve the core endpoints as `async def` over an asyncio engine. Needs
+    # aiosqlite (SQLite) or asyncpg (Postgres). ASYNC_DATABASE_URL defaults
+    # to DATABASE_URL with the matching async driver.
+    ASYNC_DB: bool = False
+    ASYNC_DATABASE_URL: str = ""
+    # Connection pool (per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 never recycles
+    DB_POOL_PRE_PING: bool = True
+    # Applied to every new SQLite connection
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE_KB: int = 8192
+    # Serialize /iterate and /reports responses with orjson and skip the
+    # response_model re-validation (needs `pip install orjson`)
+    FAST_JSON: bool = False
+    # Row ids: "uuid4" (random) or "uuid7" (time-ordered, index-friendly
+    # inserts). NATIVE_UUID stores ids in PostgreSQL's 16-byte uuid type
+    # instead of 36-char text; existing databases need migrate_ids.py first.
+    ID_SCHEME: str = "uuid4"
+    NATIVE_UUID: bool = False
+    # Iteration snapshots: "inline" (before/after JSON on every row) or
+    # "dedup" (each distinct spec stored once in spec_blobs, rows keep hashes)
+    ITERATION_STORAGE: str = "inline"
+    # Write-behind: /evaluate queues its Evaluation row for a background
+    # flusher instead of committing before it responds (per worker process)
+    WRITE_BEHIND: bool = False
+    WRITE_BEHIND_MAX_QUEUE: int = 10000
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_MS: int = 200
+    WRITE_BEHIND_PUT_TIMEOUT: float = 5.0  # seconds a producer waits on a full queue
+    BATCH_MAX_ITEMS: int = 500
+    EVALUATE_BATCH_MAX_ITEMS: int = 5000
+    # Return the existing report for a previously seen prompt instead of inserting
+    DEDUP_REPORTS: bool = False
+    # In-process LRU cache for PromptAgent/Evaluator results (per worker)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 4096
+    CACHE_TTL_SECONDS: float = 3600  # 0 disables expiry
+    # Off by default: hashing a spec costs more than the current heuristic
+    # Evaluator itself; worth enabling if evaluation becomes expensive.
+    CACHE_EVALUATOR: bool = False
+    # Cache of serialized GET /reports/{id} responses, invalidated when a
+    # report gets evaluations, iterations or feedback. "memory" is per worker
+    # (other workers' copies expire after the TTL); "redis" is shared
+    REPORT_CACHE_ENABLED: bool = False
+    REPORT_CACHE_BACKEND: str = "memory"
+    REPORT_CACHE_MAX_ENTRIES: int = 1024
+    REPORT_CACHE_TTL_SECONDS: float = 60  # 0 disables expiry
+    REPORT_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    # RLAgent learning memory: "memory" (per worker) or "db" (shared by all
+    # workers via the learning_patterns table, kept across restarts)
+    RL_MEMORY_BACKEND: str = "memory"
+    RL_MEMORY_MAX_ENTRIES: int = 1024
+    # /iterate beam search (beam_width > 1): candidates tried per beam entry
+    # per round, and worker processes for scoring rounds of at least
+    # RL_BEAM_PROCESS_MIN_CANDIDATES candidates (0 scores inline)
+    RL_BEAM_CANDIDATES: int = 16
+    RL_BEAM_PROCESSES: int = 0
+    RL_BEAM_PROCESS_MIN_CANDIDATES: int = 256
+    # /iterate early stopping (unless the request sets early_stop=false):
+    # stop at RL_TARGET_SCORE, on an unchanged spec, or after RL_PATIENCE
+    # rounds improving by less than RL_MIN_IMPROVEMENT
+    RL_TARGET_SCORE: float = 1.0
+    RL_MIN_IMPROVEMENT: float = 0.01
+    RL_PATIENCE: int = 2
 
     class Config:
         env_file = ".env"
@@ -1,10 +1,42 @@
-from typing import Union
-from sqlalchemy.orm import Session
+import hashlib
+import json
+import logging
+from datetime import datetime, date, time, timedelta
+from typing import Union, List, Tuple, Iterable, Iterator, Optional, Callable
+from sqlalchemy import insert, select, update, delete, tuple_, func, case
+from sqlalchemy.orm import Session, selectinload, defer
 from . import models
+from .config import settings
 
-def create_report(db: Session, prompt_text: str, json_spec: dict) -> models.Report:
+# Sections of a report that GET /reports/{id} can include or exclude.
+# "iteration_bodies" are the before_json/after_json payloads of each iteration.
+REPORT_SECTIONS = ("prompt_text", "json_spec", "evaluations", "iterations", "iteration_bodies", "feedback_logs")
+
+HIDG_FIELDS = ("honesty", "integrity", "discipline", "gratitude")
+
+# Called with the ids of reports whose evaluations, iterations or feedback
+# logs changed, after the commit (the report response cache registers here).
+# A failing listener is logged, never raised: the write is already committed.
+_report_listeners: List[Callable[[Iterable[str]], None]] = []
+
+def on_report_change(listener: Callable[[Iterable[str]], None]) -> None:
+    _report_listeners.append(listener)
+
+def reports_changed(report_ids: Iterable[str]) -> None:
+    report_ids = set(report_ids)
+    if report_ids:
+        for listener in _report_listeners:
+            try:
+                listener(report_ids)
+            except Exception:
+                logging.exception(f"report change listener failed for {len(report_ids)} report(s)")
+
+def prompt_hash(prompt_text: str) -> str:
+    return hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()
+
+def create_report(db: Session, prompt_text: str, json_spec: dict, prompt_hash: Optional[str] = None) -> models.Report:
     try:
-        r = models.Report(prompt_text=prompt_text, json_spec=json_spec)
+        r = models.Report(prompt_text=prompt_text, json_spec=json_spec, prompt_hash=prompt_hash)
         db.add(r)
         db.commit()
         db.refresh(r)
@@ -13,57 +45,498 @@ def create_report(db: Session, prompt_text: str, json_spec: dict) -> models.Repo
         db.rollback()
         raise
 
-def get_report(db: Session, report_id: str) -> Union[models.Report, None]:
-    return db.query(models.Report).filter_by(id=report_id).first()
+def create_reports_bulk(db: Session, items: List[Tuple[str, dict]], prompt_hashes: Optional[List[str]] = None) -> List[str]:
+    """Insert many reports in a single transaction; returns ids in input order."""
+    rows = [{"id": models.gen_uuid(), "prompt_text": prompt_text, "json_spec": json_spec}
+            for prompt_text, json_spec in items]
+    if prompt_hashes is not None:
+        for row, h in zip(rows, prompt_hashes):
+            row["prompt_hash"] = h
+    if not rows:
+        return []
+    try:
+        db.execute(insert(models.Report), rows)
+        db.commit()
+        return [row["id"] for row in rows]
+    except Exception:
+        db.rollback()
+        raise
+
+def prompt_hash_select(hashes: List[str]):
+    return (
+        select(models.Report.prompt_hash, models.Report.id, models.Report.json_spec)
+        .where(models.Report.prompt_hash.in_(hashes))
+    )
+
+def get_reports_by_prompt_hash(db: Session, hashes: Iterable[str]) -> dict:
+    """Map prompt hash -> (report id, json_spec) for hashes that already exist."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    rows = db.execute(prompt_hash_select(hashes))
+    return {h: (report_id, spec) for h, report_id, spec in rows}
+
+def report_load_options(sections: Iterable[str]) -> list:
+    """Loader options that eagerly load exactly the given report sections.
+
+    Requested collections are fetched with selectin loading (one IN query per
+    collection rather than a lazy load on attribute access, and no row fan-out
+    as joining three sibling collections would cause). Unrequested columns
+    are deferred so they are never read from the database.
+    """
+    sections = set(sections)
+    opts = [defer(getattr(models.Report, col)) for col in ("prompt_text", "json_spec") if col not in sections]
+    if "evaluations" in sections:
+        opts.append(selectinload(models.Report.evaluations))
+    if "iterations" in sections:
+        load = selectinload(models.Report.iterations)
+        if "iteration_bodies" not in sections:
+            opts.append(load.defer(models.Iteration.before_json).defer(models.Iteration.after_json))
+        else:
+            # deduplicated bodies live in spec_blobs
+            opts.append(load.selectinload(models.Iteration.before_blob))
+            opts.append(load.selectinload(models.Iteration.after_blob))
+    if "feedback_logs" in sections:
+        opts.append(selectinload(models.Report.feedback_logs))
+    return opts
+
+def get_report(db: Session, report_id: str, sections: Union[Iterable[str], None] = None) -> Union[models.Report, None]:
+    """Load a report; with `sections`, eagerly load exactly those parts."""
+    q = db.query(models.Report).filter_by(id=report_id)
+    if sections is not None:
+        q = q.options(*report_load_options(sections))
+    return q.first()
+
+def iter_reports_for_export(db: Session, since: Optional[datetime] = None,
+                            batch_size: int = 500) -> Iterator[models.Report]:
+    """Every report with all its sections, oldest first, streamed in batches
+    of `batch_size` (server-side cursor; children selectin-loaded per batch).
+
+    With `since`, only reports created at or after it, plus older reports
+    that received an evaluation since then.
+    """
+    stmt = select(models.Report).options(*report_load_options(REPORT_SECTIONS))
+    if since is not None:
+        evaluated_since = (
+            select(models.Evaluation.id)
+            .where(models.Evaluation.report_id == models.Report.id, models.Evaluation.created_at >= since)
+            .exists()
+        )
+        stmt = stmt.where((models.Report.created_at >= since) | evaluated_since)
+    stmt = stmt.order_by(models.Report.created_at, models.Report.id).execution_options(yield_per=batch_size)
+    yield from db.scalars(stmt)
+
+def latest_score_subquery():
+    """Correlated scalar subquery: score of a report's most recent evaluation."""
+    return (
+        select(models.Evaluation.score)
+        .where(models.Evaluation.report_id == models.Report.id)
+        .order_by(models.Evaluation.created_at.desc(), models.Evaluation.id.desc())
+        .limit(1)
+        .correlate(models.Report)
+        .scalar_subquery()
+    )
+
+def list_reports(db: Session, limit: int, after: Optional[Tuple[datetime, str]] = None,
+                 priority: Optional[str] = None, min_score: Optional[float] = None,
+                 max_score: Optional[float] = None) -> List[Tuple[models.Report, Optional[float]]]:
+    """Newest-first page of (report, latest score) using keyset pagination.
+
+    `after` is the (created_at, id) of the last row of the previous page, so
+    each page is an index range scan on ix_reports_created_at_id regardless
+    of how deep the client has paged.
+    """
+    latest_score = latest_score_subquery()
+    q = db.query(models.Report, latest_score.label("latest_score"))
+    if after is not None:
+        q = q.filter(tuple_(models.Report.created_at, models.Report.id) < tuple_(*after))
+    if priority:
+        q = q.filter(models.Report.json_spec["priority"].as_string() == priority)
+    if min_score is not None:
+        q = q.filter(latest_score >= min_score)
+    if max_score is not None:
+        q = q.filter(latest_score <= max_score)
+    q = q.order_by(models.Report.created_at.desc(), models.Report.id.desc()).limit(limit)
+    return [(r, score) for r, score in q.all()]
 
 def add_evaluation(db: Session, report_id: str, score: float, comments: str) -> models.Evaluation:
     try:
         e = models.Evaluation(report_id=report_id, score=score, comments=comments)
         db.add(e)
         db.commit()
-        db.refresh(e)
-        return e
     except Exception:
         db.rollback()
         raise
+    reports_changed([report_id])
+    db.refresh(e)
+    return e
+
+def get_report_specs(db: Session, report_ids: Iterable[str]) -> dict:
+    """{report_id: json_spec} for the given ids that exist, in one IN query."""
+    report_ids = list(set(report_ids))
+    if not report_ids:
+        return {}
+    rows = db.execute(select(models.Report.id, models.Report.json_spec).where(models.Report.id.in_(report_ids)))
+    return {report_id: spec for report_id, spec in rows}
+
+def add_evaluations_bulk(db: Session, items: List[Tuple[str, float, str]]) -> int:
+    """Insert many (report_id, score, comments) evaluations in a single transaction."""
+    if not items:
+        return 0
+    now = datetime.utcnow()
+    rows = [{"id": models.gen_uuid(), "report_id": report_id, "score": score, "comments": comments,
+             "created_at": now} for report_id, score, comments in items]
+    try:
+        db.execute(insert(models.Evaluation), rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    reports_changed(report_id for report_id, _, _ in items)
+    return len(rows)
 
 def add_feedback(db: Session, report_id: str, feedback: str) -> models.FeedbackLog:
     try:
         f = models.FeedbackLog(report_id=report_id, feedback=feedback)
         db.add(f)
         db.commit()
-        db.refresh(f)
-        return f
     except Exception:
         db.rollback()
         raise
+    reports_changed([report_id])
+    db.refresh(f)
+    return f
+
+def add_logs_bulk(db: Session, evaluations: List[dict], feedback_logs: List[dict]) -> int:
+    """Insert prepared Evaluation and FeedbackLog rows (column dicts with
+    id and created_at already set) in a single transaction."""
+    try:
+        if evaluations:
+            db.execute(insert(models.Evaluation), evaluations)
+        if feedback_logs:
+            db.execute(insert(models.FeedbackLog), feedback_logs)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    reports_changed(row["report_id"] for row in evaluations + feedback_logs)
+    return len(evaluations) + len(feedback_logs)
+
+def spec_hash(spec: dict) -> str:
+    """sha256 of a spec's canonical JSON: the key of its spec_blobs row."""
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _iteration_from_record(report_id: str, rec: dict, blobs: Optional[dict] = None) -> models.Iteration:
+    """Iteration row for a history record. With `blobs` (dedup storage) the
+    specs are added to it by hash and the row only keeps the hashes."""
+    bodies = {"before_json": rec["before_json"], "after_json": rec["after_json"]}
+    if blobs is not None:
+        before_hash, after_hash = spec_hash(rec["before_json"]), spec_hash(rec["after_json"])
+        blobs[before_hash], blobs[after_hash] = rec["before_json"], rec["after_json"]
+        bodies = {"before_json": None, "after_json": None, "before_hash": before_hash, "after_hash": after_hash}
+    return models.Iteration(
+        report_id=report_id,
+        iteration_number=rec["iteration_number"],
+        score_before=rec["score_before"],
+        score_after=rec["score_after"],
+        feedback=rec["feedback"],
+        **bodies
+    )
+
+def _spec_blobs() -> Optional[dict]:
+    return {} if settings.ITERATION_STORAGE == "dedup" else None
+
+def spec_blobs_insert(dialect_name: str, blobs: dict):
+    """INSERT of `blobs` ({hash: spec}) that skips hashes already stored, or
+    None on backends without ON CONFLICT support."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    stmt = dialect_insert(models.SpecBlob).values([{"hash": h, "body": body} for h, body in blobs.items()])
+    return stmt.on_conflict_do_nothing(index_elements=[models.SpecBlob.hash])
+
+def store_spec_blobs(db: Session, blobs: Optional[dict]) -> None:
+    """Add missing spec blobs within the caller's transaction."""
+    if not blobs:
+        return
+    stmt = spec_blobs_insert(db.get_bind().dialect.name, blobs)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+    present = set(db.execute(select(models.SpecBlob.hash).where(models.SpecBlob.hash.in_(list(blobs)))).scalars())
+    db.add_all(models.SpecBlob(hash=h, body=body) for h, body in blobs.items() if h not in present)
 
 def add_iteration(db: Session, report_id: str, rec: dict):
     try:
-        it = models.Iteration(
-            report_id=report_id,
-            iteration_number=rec["iteration_number"],
-            before_json=rec["before_json"],
-            after_json=rec["after_json"],
-            score_before=rec["score_before"],
-            score_after=rec["score_after"],
-            feedback=rec["feedback"]
-        )
+        blobs = _spec_blobs()
+        it = _iteration_from_record(report_id, rec, blobs)
+        store_spec_blobs(db, blobs)
         db.add(it)
         db.commit()
-        db.refresh(it)
-        return it
     except Exception:
         db.rollback()
         raise
+    reports_changed([report_id])
+    db.refresh(it)
+    return it
+
+def _history_rows(report_id: str, rec: dict, blobs: Optional[dict]) -> list:
+    rows = [_iteration_from_record(report_id, rec, blobs)]
+    if rec.get("feedback"):
+        rows.append(models.FeedbackLog(report_id=report_id, feedback=rec["feedback"]))
+    return rows
+
+def add_history_record(db: Session, report_id: str, rec: dict) -> None:
+    """Persist one history record (its iteration and feedback log) of an
+    existing report in its own transaction, as /iterate/stream produces them."""
+    blobs = _spec_blobs()
+    rows = _history_rows(report_id, rec, blobs)
+    try:
+        store_spec_blobs(db, blobs)
+        db.add_all(rows)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    reports_changed([report_id])
+
+def report_with_history_rows(prompt_text: str, json_spec: dict, history: List[dict]) -> Tuple[str, list, Optional[dict]]:
+    """New Report plus its Iteration and FeedbackLog objects, ready to add(),
+    and the spec blobs they reference (None with inline storage)."""
+    report_id = models.gen_uuid()
+    blobs = _spec_blobs()
+    rows = [models.Report(id=report_id, prompt_text=prompt_text, json_spec=json_spec)]
+    for rec in history:
+        rows.extend(_history_rows(report_id, rec, blobs))
+    return report_id, rows, blobs
+
+def create_report_with_history(db: Session, prompt_text: str, json_spec: dict, history: List[dict]) -> str:
+    """Persist a report with all its iterations and feedback logs in one transaction.
+
+    Returns the new report id (no refresh round-trip after the commit).
+    """
+    report_id, rows, blobs = report_with_history_rows(prompt_text, json_spec, history)
+    try:
+        store_spec_blobs(db, blobs)
+        db.add_all(rows)
+        db.commit()
+        return report_id
+    except Exception:
+        db.rollback()
+        raise
+
+def compact_iterations(db: Session, batch_size: int = 1000) -> int:
+    """Move inline iteration bodies into spec_blobs, one transaction per
+    batch; returns the number of rows converted."""
+    converted = 0
+    while True:
+        rows = db.execute(
+            select(models.Iteration.id, models.Iteration.before_json, models.Iteration.after_json)
+            .where(models.Iteration.before_hash.is_(None))
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return converted
+        blobs, updates = {}, []
+        for it_id, before, after in rows:
+            before_hash, after_hash = spec_hash(before), spec_hash(after)
+            blobs[before_hash], blobs[after_hash] = before, after
+            updates.append({"id": it_id, "before_hash": before_hash, "after_hash": after_hash,
+                            "before_json": None, "after_json": None})
+        try:
+            store_spec_blobs(db, blobs)
+            db.execute(update(models.Iteration), updates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        converted += len(rows)
+
+def hidg_rollup_values(v: models.HIDGValue) -> dict:
+    """One entry's contribution to its day's HIDGDailyRollup row."""
+    return {
+        "day": v.created_at.date(),
+        "entries": 1,
+        **{f"{f}_chars": len(getattr(v, f)) for f in HIDG_FIELDS},
+        "last_entry_at": v.created_at,
+    }
+
+def hidg_rollup_upsert(dialect_name: str, values: dict):
+    """INSERT ... ON CONFLICT (day) DO UPDATE that adds `values` to the day's
+    totals atomically, or None on backends without ON CONFLICT support."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    rollup = models.HIDGDailyRollup
+    stmt = dialect_insert(rollup).values(**values)
+    return stmt.on_conflict_do_update(index_elements=[rollup.day], set_=_hidg_rollup_increments(values))
+
+def _hidg_rollup_increments(values: dict) -> dict:
+    rollup = models.HIDGDailyRollup
+    return {
+        "entries": rollup.entries + values["entries"],
+        **{f"{f}_chars": getattr(rollup, f"{f}_chars") + values[f"{f}_chars"] for f in HIDG_FIELDS},
+        "last_entry_at": case(
+            (rollup.last_entry_at < values["last_entry_at"], values["last_entry_at"]),
+            else_=rollup.last_entry_at,
+        ),
+    }
+
+def add_to_hidg_rollup(db: Session, values: dict) -> None:
+    """Add `values` to the day's rollup row within the caller's transaction:
+    one upsert where supported, else UPDATE and INSERT if no row matched."""
+    stmt = hidg_rollup_upsert(db.get_bind().dialect.name, values)
+    if stmt is not None:
+        db.execute(stmt)
+        return
+    updated = db.execute(
+        update(models.HIDGDailyRollup)
+        .where(models.HIDGDailyRollup.day == values["day"])
+        .values(**_hidg_rollup_increments(values))
+    )
+    if not updated.rowcount:
+        db.add(models.HIDGDailyRollup(**values))
 
 def log_hidg(db: Session, honesty: str, integrity: str, discipline: str, gratitude: str) -> models.HIDGValue:
+    """Store an entry and add it to its day's rollup in the same transaction."""
     try:
-        v = models.HIDGValue(honesty=honesty, integrity=integrity, discipline=discipline, gratitude=gratitude)
+        v = models.HIDGValue(honesty=honesty, integrity=integrity, discipline=discipline,
+                             gratitude=gratitude, created_at=datetime.utcnow())
         db.add(v)
+        add_to_hidg_rollup(db, hidg_rollup_values(v))
         db.commit()
         db.refresh(v)
         return v
     except Exception:
         db.rollback()
         raise
+
+def log_hidg_bulk(db: Session, entries: List[dict]) -> int:
+    """Insert many HIDG entries (dicts of the four fields, optionally
+    created_at) and fold them into the daily rollup, in one transaction."""
+    if not entries:
+        return 0
+    now = datetime.utcnow()
+    rows = [{"id": models.gen_uuid(), **{f: e[f] for f in HIDG_FIELDS},
+             "created_at": e.get("created_at") or now} for e in entries]
+    per_day = {}
+    for row in rows:
+        values = hidg_rollup_values(models.HIDGValue(**row))
+        day = per_day.get(values["day"])
+        if day is None:
+            per_day[values["day"]] = values
+            continue
+        for key in ("entries", *(f"{f}_chars" for f in HIDG_FIELDS)):
+            day[key] += values[key]
+        day["last_entry_at"] = max(day["last_entry_at"], values["last_entry_at"])
+    try:
+        db.execute(insert(models.HIDGValue), rows)
+        for values in per_day.values():
+            add_to_hidg_rollup(db, values)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+
+def list_hidg_values(db: Session, limit: int, after: Optional[Tuple[datetime, str]] = None) -> List[models.HIDGValue]:
+    """Newest-first page of HIDG entries; `after` is the (created_at, id) of
+    the previous page's last row (index range scan on ix_hidg_values_created_at_id)."""
+    q = db.query(models.HIDGValue)
+    if after is not None:
+        q = q.filter(tuple_(models.HIDGValue.created_at, models.HIDGValue.id) < tuple_(*after))
+    return q.order_by(models.HIDGValue.created_at.desc(), models.HIDGValue.id.desc()).limit(limit).all()
+
+def count_hidg_values(db: Session) -> int:
+    """Total HIDG entries, summed from the per-day rollup instead of COUNT(*)."""
+    return db.execute(select(func.coalesce(func.sum(models.HIDGDailyRollup.entries), 0))).scalar_one()
+
+def _hidg_sums():
+    return [func.count(models.HIDGValue.id)] + [
+        func.coalesce(func.sum(func.length(getattr(models.HIDGValue, f))), 0) for f in HIDG_FIELDS
+    ] + [func.max(models.HIDGValue.created_at)]
+
+def rebuild_hidg_rollup(db: Session) -> int:
+    """Recompute hidg_daily_rollups from hidg_values; returns the number of days."""
+    day = func.date(models.HIDGValue.created_at)
+    try:
+        rows = db.execute(select(day, *_hidg_sums()).group_by(day)).all()
+        db.execute(delete(models.HIDGDailyRollup))
+        if rows:
+            db.execute(insert(models.HIDGDailyRollup), [
+                {"day": date.fromisoformat(str(d)), "entries": entries,
+                 **{f"{f}_chars": int(c) for f, c in zip(HIDG_FIELDS, chars)},
+                 "last_entry_at": last}
+                for d, entries, *chars, last in rows
+            ])
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+
+def _hidg_bucket(day: date, entries: int, chars: Iterable[int], last: datetime) -> dict:
+    return {"date": day.isoformat(), "entries": entries, "chars": list(chars), "last_entry_at": last}
+
+def hidg_analytics(db: Session, since: Optional[datetime] = None) -> dict:
+    """Entry count, latest entry time and average field lengths since `since`
+    (all time when None), overall and per calendar day (UTC).
+
+    Whole days are read from hidg_daily_rollups, so the cost grows with the
+    number of days in the window, not the number of entries. When `since`
+    falls mid-day, only that one day's entries are aggregated from
+    hidg_values.
+    """
+    rollup = models.HIDGDailyRollup
+    q = select(rollup.day, rollup.entries, *[getattr(rollup, f"{f}_chars") for f in HIDG_FIELDS],
+               rollup.last_entry_at)
+    buckets = []
+    if since is not None:
+        first_day = since.date()
+        if since == datetime.combine(first_day, time.min):
+            q = q.where(rollup.day >= first_day)
+        else:
+            q = q.where(rollup.day > first_day)
+            entries, *chars, last = db.execute(
+                select(*_hidg_sums()).where(
+                    models.HIDGValue.created_at >= since,
+                    models.HIDGValue.created_at < datetime.combine(first_day + timedelta(days=1), time.min),
+                )
+            ).one()
+            if entries:
+                buckets.append(_hidg_bucket(first_day, entries, chars, last))
+    buckets += [_hidg_bucket(d, entries, chars, last) for d, entries, *chars, last in db.execute(q.order_by(rollup.day))]
+
+    def averages(entries, chars):
+        return {f: (c / entries if entries else 0.0) for f, c in zip(HIDG_FIELDS, chars)}
+
+    total = sum(b["entries"] for b in buckets)
+    totals = [sum(b["chars"][i] for b in buckets) for i in range(len(HIDG_FIELDS))]
+    return {
+        "entries": total,
+        "average_reflection_length": averages(total, totals),
+        "latest_entry": max((b["last_entry_at"] for b in buckets), default=None),
+        "daily": [
+            {"date": b["date"], "entries": b["entries"],
+             "average_reflection_length": averages(b["entries"], b["chars"])}
+            for b in buckets
+        ],
+    }
+
+def latest_hidg_sample(db: Session, since: Optional[datetime] = None, chars: int = 100):
+    """(honesty, gratitude) of the newest entry, each truncated in SQL to
+    `chars` + 1 characters so long reflections are not transferred."""
+    q = select(
+        func.substr(models.HIDGValue.honesty, 1, chars + 1),
+        func.substr(models.HIDGValue.gratitude, 1, chars + 1),
+    )
+    if since is not None:
+        q = q.where(models.HIDGValue.created_at >= since)
+    return db.execute(q.order_by(models.HIDGValue.created_at.desc()).limit(1)).first()
@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import settings
 
@@ -8,13 +9,108 @@ connect_args = {}
 if DATABASE_URL.startswith("sqlite"):
     connect_args = {"check_same_thread": False}
 
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
+def pool_options(url: str, is_async: bool = False) -> dict:
+    """Pool settings for `url`. In-memory SQLite keeps SQLAlchemy's
+    single-connection pool, which takes no sizing arguments."""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING, "pool_recycle": settings.DB_POOL_RECYCLE}
+    u = make_url(url)
+    if not (u.get_backend_name() == "sqlite" and u.database in (None, "", ":memory:")):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+        if is_async and u.get_backend_name() == "sqlite":
+            from sqlalchemy.pool import AsyncAdaptedQueuePool
+            options["poolclass"] = AsyncAdaptedQueuePool  # aiosqlite otherwise opens a connection per checkout
+    return options
+
+def sqlite_pragmas() -> list:
+    journal_mode = settings.SQLITE_JOURNAL_MODE.upper()
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if journal_mode not in {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}:
+        raise ValueError(f"Invalid SQLITE_JOURNAL_MODE: {settings.SQLITE_JOURNAL_MODE}")
+    if synchronous not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {settings.SQLITE_SYNCHRONOUS}")
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}",  # negative = KiB
+    ]
+
+def apply_sqlite_pragmas(sync_engine) -> None:
+    """WAL lets readers run alongside the writer across worker processes,
+    and busy_timeout makes writers wait instead of failing with
+    "database is locked"."""
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args,
+                       **pool_options(DATABASE_URL))
+if engine.dialect.name == "sqlite":
+    apply_sqlite_pragmas(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
 
+def async_database_url(url: str) -> str:
+    """DATABASE_URL rewritten for the asyncio driver of the same database."""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgres"):
+        # asyncpg spells libpq's sslmode= as ssl=
+        return f"postgresql+asyncpg://{rest}".replace("sslmode=", "ssl=")
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.ASYNC_DB:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(_async_url, echo=False, **pool_options(_async_url, is_async=True))
+    if async_engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(async_engine.sync_engine)
+    # no expiry on commit: attributes can't be lazily refreshed under asyncio
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def init_db():
+    """Create missing tables, then bring already existing tables up to date:
+    nullable columns and indexes added to the models since are created too.
+    A newly created HIDG rollup table is backfilled from existing entries.
+    """
+    rollup_missing = not inspect(engine).has_table("hidg_daily_rollups")
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    if rollup_missing:
+        from .crud import rebuild_hidg_rollup
+        with SessionLocal() as db:
+            rebuild_hidg_rollup(db)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
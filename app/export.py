@@ -0,0 +1,54 @@
+"""NDJSON export of reports with their full history, shared by
+GET /export/reports and export_reports.py.
+
+Rows are streamed from the database in batches and serialized one line at
+a time, so memory stays flat however many reports are exported.
+"""
+import json
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
+from . import crud
+from .serializers import report_to_dict
+
+ALL_SECTIONS = set(crud.REPORT_SECTIONS)
+
+def report_lines(session_factory: Callable, since: Optional[datetime] = None,
+                 batch_size: int = 500) -> Iterator[bytes]:
+    """One JSON object per report: its columns, evaluations, iterations and
+    feedback logs. Opens its own session, as streaming outlives the request's."""
+    db = session_factory()
+    try:
+        for rpt in crud.iter_reports_for_export(db, since=since, batch_size=batch_size):
+            row = report_to_dict(rpt, ALL_SECTIONS)
+            row["created_at"] = rpt.created_at.isoformat()
+            yield (json.dumps(row, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode()
+    finally:
+        db.close()
+
+def gzip_chunks(chunks: Iterable[bytes], flush_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member, emitting compressed
+    output roughly every `flush_bytes` of input."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    pending = 0
+    for chunk in chunks:
+        out = gz.compress(chunk)
+        pending += len(chunk)
+        if pending >= flush_bytes:
+            out += gz.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield gz.flush()
+
+def batched(lines: Iterable[bytes], size: int = 64 * 1024) -> Iterator[bytes]:
+    """Join small lines into ~`size` byte chunks to cut per-write overhead."""
+    buf, n = [], 0
+    for line in lines:
+        buf.append(line)
+        n += len(line)
+        if n >= size:
+            yield b"".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield b"".join(buf)
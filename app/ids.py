@@ -0,0 +1,33 @@
+"""Row id generation.
+
+UUIDv7 (RFC 9562) puts a millisecond timestamp in the leading 48 bits, so
+new ids sort after old ones: inserts append to the right edge of primary
+key and foreign key B-tree indexes instead of landing on random pages.
+"""
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID; ids made in the same millisecond by this process
+    stay ordered through a 12-bit counter seeded randomly each millisecond."""
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms, _counter = ms, int.from_bytes(os.urandom(2), "big") & 0x7FF
+        else:
+            # same millisecond (or the clock stepped back): keep counting
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms, _counter = _last_ms + 1, 0
+            ms = _last_ms
+        counter = _counter
+    rand_b = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b
+    return uuid.UUID(int=value)
@@ -1,31 +1,43 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi import FastAPI, Depends, HTTPException, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
-from .database import Base, engine, get_db
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from .database import init_db, get_db, SessionLocal
 from .config import settings
 from . import models, crud
 from .schemas import (
-    PromptIn, GenerateOut, EvaluateIn, EvaluateOut,
-    IterateIn, IterateOut, IterationRecord,
-    HIDGIn, HIDGOut, ReportOut
+    PROMPT_MAX_CHARS, PromptIn, BatchPromptIn, GenerateOut, BatchGenerateOut, EvaluateIn, EvaluateOut,
+    EvaluateBatchIn, EvaluateBatchOut,
+    IterateIn, IterateOut,
+    HIDGIn, HIDGOut, ReportOut, ReportPage
 )
-from typing import List
-from .services.prompt_agent import PromptAgent
-from .services.evaluator import Evaluator
-from .services.rl_agent import RLAgent
+from typing import List, Optional
+from datetime import datetime, timedelta
+from .agents import generator, evaluator, rl, convergence_monitor, write_behind, report_cache, beam_pool
+from .services.write_behind import WriteBehindFull
+from .serializers import (parse_sections, report_to_dict, encode_cursor, decode_cursor, naive_utc, fast_json,
+                          report_body, report_response)
+from .export import report_lines, batched, gzip_chunks
+import json
 import logging
 import traceback
 
 # Create tables (with error handling for deployment)
 try:
-    Base.metadata.create_all(bind=engine)
+    init_db()
 except Exception as e:
     print(f"Database initialization warning: {e}")
 
 app = FastAPI(title=settings.APP_NAME)
 
+@app.on_event("shutdown")
+def stop_background_workers():
+    if write_behind is not None:
+        write_behind.stop()
+    if beam_pool is not None:
+        beam_pool.shutdown()
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -54,10 +66,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-generator = PromptAgent()
-evaluator = Evaluator()
-rl = RLAgent()
-
 @app.post("/generate", response_model=GenerateOut, summary="Input prompt → JSON spec")
 def generate(payload: PromptIn, db: Session = Depends(get_db)):
     if not payload.prompt or not payload.prompt.strip():
@@ -65,11 +73,25 @@ def generate(payload: PromptIn, db: Session = Depends(get_db)):
     if len(payload.prompt) > 5000:
         raise HTTPException(status_code=400, detail="Prompt too long (max 5000 chars)")
     
+    prompt = payload.prompt.strip()
     try:
-        spec = generator.run(payload.prompt.strip())
+        h = crud.prompt_hash(prompt) if settings.DEDUP_REPORTS else None
+        if h:
+            existing = crud.get_reports_by_prompt_hash(db, [h]).get(h)
+            if existing:
+                return {"id": existing[0], "json_spec": existing[1], "deduplicated": True}
+
+        spec = generator.run(prompt)
         if not spec or not isinstance(spec, dict):
             raise ValueError("Invalid JSON spec generated")
-        report = crud.create_report(db, prompt_text=payload.prompt.strip(), json_spec=spec)
+        try:
+            report = crud.create_report(db, prompt_text=prompt, json_spec=spec, prompt_hash=h)
+        except IntegrityError:
+            # a concurrent request stored the same prompt first
+            existing = crud.get_reports_by_prompt_hash(db, [h]).get(h) if h else None
+            if not existing:
+                raise
+            return {"id": existing[0], "json_spec": existing[1], "deduplicated": True}
         return {"id": report.id, "json_spec": spec}
     except SQLAlchemyError as e:
         db.rollback()
@@ -78,6 +100,75 @@ def generate(payload: PromptIn, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Generation failed: {str(e)}")
 
+@app.post("/generate/batch", response_model=BatchGenerateOut, summary="Input many prompts → JSON specs in one transaction")
+def generate_batch(payload: List[BatchPromptIn], db: Session = Depends(get_db)):
+    if not payload:
+        raise HTTPException(status_code=400, detail="Provide at least one prompt")
+    if len(payload) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many prompts (max {settings.BATCH_MAX_ITEMS})")
+
+    results = [{"index": i} for i in range(len(payload))]
+    prompts = {}  # index -> stripped prompt for items that passed validation
+    for i, item in enumerate(payload):
+        prompt = (item.prompt or "").strip()
+        if not prompt:
+            results[i]["error"] = "Prompt cannot be empty"
+        elif len(item.prompt) > PROMPT_MAX_CHARS:
+            results[i]["error"] = f"Prompt too long (max {PROMPT_MAX_CHARS} chars)"
+        else:
+            prompts[i] = prompt
+
+    hashes = {i: crud.prompt_hash(p) for i, p in prompts.items()} if settings.DEDUP_REPORTS else {}
+    try:
+        existing = crud.get_reports_by_prompt_hash(db, hashes.values())
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+    pending = []  # (index, prompt_text, spec) for items to insert
+    first_seen = {}  # prompt hash -> index of its first occurrence in this batch
+    for i, prompt in prompts.items():
+        h = hashes.get(i)
+        if h in existing:
+            results[i].update(id=existing[h][0], json_spec=existing[h][1], deduplicated=True)
+            continue
+        if h and h in first_seen:
+            continue  # filled in from the first occurrence, success or error
+        if h:
+            first_seen[h] = i
+        try:
+            spec = generator.run(prompt)
+            if not spec or not isinstance(spec, dict):
+                raise ValueError("Invalid JSON spec generated")
+            pending.append((i, prompt, spec))
+        except Exception as e:
+            results[i]["error"] = f"Generation failed: {str(e)}"
+
+    try:
+        ids = crud.create_reports_bulk(
+            db, [(prompt, spec) for _, prompt, spec in pending],
+            prompt_hashes=[hashes[i] for i, _, _ in pending] if hashes else None,
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Some prompts were stored concurrently; retry the batch")
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Database error occurred")
+
+    for (i, _, spec), report_id in zip(pending, ids):
+        results[i]["id"] = report_id
+        results[i]["json_spec"] = spec
+    for i, h in hashes.items():
+        j = first_seen.get(h)
+        if j is None or j == i:
+            continue
+        if "id" in results[j]:
+            results[i].update(id=results[j]["id"], json_spec=results[j]["json_spec"], deduplicated=True)
+        else:
+            results[i]["error"] = results[j]["error"]
+
+    created = len(ids)
+    failed = sum(1 for r in results if r.get("error"))
+    return {"results": results, "created": created, "failed": failed}
+
 @app.post("/evaluate", response_model=EvaluateOut, summary="Evaluate a JSON spec")
 def evaluate(payload: EvaluateIn, db: Session = Depends(get_db)):
     try:
@@ -93,14 +184,66 @@ def evaluate(payload: EvaluateIn, db: Session = Depends(get_db)):
 
         res = evaluator.run(spec)
         if payload.report_id:
-            crud.add_evaluation(db, payload.report_id, res["score"], res["comments"])
+            if write_behind is not None:
+                write_behind.add_evaluation(payload.report_id, res["score"], res["comments"])
+            else:
+                crud.add_evaluation(db, payload.report_id, res["score"], res["comments"])
         return {"score": res["score"], "comments": res["comments"]}
     except HTTPException:
         raise
+    except WriteBehindFull:
+        raise HTTPException(status_code=503, detail="Evaluation queue is full, retry later")
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Evaluation failed: {str(e)}")
 
+@app.post("/evaluate/batch", response_model=EvaluateBatchOut, summary="Evaluate many reports or JSON specs at once")
+def evaluate_batch(payload: EvaluateBatchIn, db: Session = Depends(get_db)):
+    if payload.report_ids and payload.json_specs:
+        raise HTTPException(status_code=400, detail="Provide report_ids or json_specs, not both")
+    count = len(payload.report_ids) or len(payload.json_specs)
+    if not count:
+        raise HTTPException(status_code=400, detail="Provide report_ids or json_specs")
+    if count > settings.EVALUATE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items (max {settings.EVALUATE_BATCH_MAX_ITEMS})")
+
+    if payload.report_ids:
+        results = [{"index": i, "report_id": rid} for i, rid in enumerate(payload.report_ids)]
+        try:
+            specs = crud.get_report_specs(db, payload.report_ids)
+        except SQLAlchemyError:
+            raise HTTPException(status_code=500, detail="Database error occurred")
+        for res in results:
+            if res["report_id"] not in specs:
+                res["error"] = "Report not found"
+        todo = [(res, specs[res["report_id"]]) for res in results if "error" not in res]
+    else:
+        results = [{"index": i} for i in range(count)]
+        todo = list(zip(results, payload.json_specs))
+
+    try:
+        scored = evaluator.run_batch([spec for _, spec in todo])
+    except Exception:
+        # a malformed spec fails the whole batch; score one by one to isolate it
+        scored = []
+        for _, spec in todo:
+            try:
+                scored.append(evaluator.run(spec))
+            except Exception as e:
+                scored.append({"error": f"Evaluation failed: {str(e)}"})
+    for (res, _), outcome in zip(todo, scored):
+        res.update(outcome)
+
+    if payload.report_ids:
+        try:
+            crud.add_evaluations_bulk(db, [(r["report_id"], r["score"], r["comments"])
+                                           for r in results if "error" not in r])
+        except SQLAlchemyError:
+            raise HTTPException(status_code=500, detail="Database error occurred")
+
+    failed = sum(1 for r in results if "error" in r)
+    return {"results": results, "evaluated": len(results) - failed, "failed": failed}
+
 @app.post("/iterate", response_model=IterateOut, summary="Iterative improvement loop with genuine RL learning")
 def iterate(payload: IterateIn, db: Session = Depends(get_db)):
     if not payload.prompt or not payload.prompt.strip():
@@ -112,32 +255,22 @@ def iterate(payload: IterateIn, db: Session = Depends(get_db)):
         spec = generator.run(payload.prompt.strip())
         if not spec or not isinstance(spec, dict):
             raise ValueError("Invalid JSON spec generated")
-        report = crud.create_report(db, prompt_text=payload.prompt.strip(), json_spec=spec)
-
-        # Enhanced RL with genuine learning
-        history = rl.run(payload.prompt.strip(), max_iters=payload.max_iters)
+        # Enhanced RL with genuine learning, continuing from the spec generated above
+        monitor = convergence_monitor() if payload.early_stop else None
+        history = rl.run_from_spec(spec, max_iters=payload.max_iters, beam_width=payload.beam_width,
+                                   monitor=monitor)
         if not history or len(history) == 0:
             raise ValueError("No iterations generated")
-            
-        # Validate learning progression
-        for i, rec in enumerate(history):
-            if i > 0 and rec.get("score_after", 0) < history[i-1].get("score_after", 0) - 0.1:
-                # Allow some variance but ensure general improvement
-                pass
-            crud.add_iteration(db, report.id, rec)
-            if rec.get("feedback"):
-                crud.add_feedback(db, report.id, rec["feedback"])
 
-        return {
-            "report_id": report.id,
-            "iterations": [IterationRecord(**rec) for rec in history],
-            "learning_summary": {
-                "total_iterations": len(history),
-                "initial_score": history[0].get("score_before", 0) if history else 0,
-                "final_score": history[-1].get("score_after", 0) if history else 0,
-                "improvement": (history[-1].get("score_after", 0) - history[0].get("score_before", 0)) if history else 0
-            }
-        }
+        # Report, iterations and feedback logs are written as one unit of work
+        report_id = crud.create_report_with_history(db, payload.prompt.strip(), spec, history)
+
+        # history records already have exactly the IterationRecord fields
+        return fast_json({
+            "report_id": report_id,
+            "iterations": history,
+            "stop_reason": monitor.stop_reason if monitor else "max_iters",
+        })
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(status_code=500, detail="Database error occurred")
@@ -145,43 +278,128 @@ def iterate(payload: IterateIn, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Iteration failed: {str(e)}")
 
-@app.get("/reports/{report_id}", response_model=ReportOut, summary="Fetch a full report with history")
-def get_report(report_id: str, db: Session = Depends(get_db)):
+def _stream_event(event: str, data: dict, sse: bool) -> bytes:
+    body = json.dumps({"event": event, **data}, ensure_ascii=False, separators=(",", ":"), default=str)
+    return (f"event: {event}\ndata: {body}\n\n" if sse else body + "\n").encode()
+
+def _iterate_events(report_id: str, spec: dict, max_iters: int, early_stop: bool, sse: bool):
+    """Run the RL loop, committing each round before it is sent. Each round
+    uses its own short session (streaming outlives the request's), so no
+    connection is held across a yield: a client that disconnects leaves
+    nothing checked out, even though Starlette never closes this generator."""
+    monitor = convergence_monitor() if early_stop else None
+    try:
+        yield _stream_event("report", {"report_id": report_id, "json_spec": spec}, sse)
+        done = 0
+        for rec in rl.iter_from_spec(spec, max_iters=max_iters, monitor=monitor):
+            with SessionLocal() as db:
+                crud.add_history_record(db, report_id, rec)
+            done += 1
+            yield _stream_event("iteration", rec, sse)
+        yield _stream_event("done", {"report_id": report_id, "iterations": done,
+                                     "stop_reason": monitor.stop_reason if monitor else "max_iters"}, sse)
+    except Exception as e:
+        # headers are already sent: report the failure in-band; earlier rounds stay stored
+        logging.error(f"/iterate/stream failed: {str(e)}\n{traceback.format_exc()}")
+        yield _stream_event("error", {"report_id": report_id, "detail": f"Iteration failed: {str(e)}"}, sse)
+
+@app.post("/iterate/stream", summary="Iterative improvement loop, streaming each iteration as it completes")
+def iterate_stream(payload: IterateIn, format: str = "ndjson", db: Session = Depends(get_db)):
+    """Like /iterate, but the report is stored first and every iteration is
+    persisted and sent as soon as it is done: a `report` event, one
+    `iteration` event per round (IterationRecord fields), then `done` with
+    the stop_reason. `format=ndjson` (default) sends one JSON object per
+    line; `format=sse` sends server-sent events. Rounds completed before a
+    client disconnects remain stored."""
+    if not payload.prompt or not payload.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+    if format not in {"ndjson", "sse"}:
+        raise HTTPException(status_code=400, detail="format must be one of: ndjson|sse")
+    if payload.beam_width > 1:
+        # beam search only knows the winning trajectory after the last round
+        raise HTTPException(status_code=400, detail="Streaming supports beam_width=1 only; use /iterate for beam search")
+
+    try:
+        spec = generator.run(payload.prompt.strip())
+        if not spec or not isinstance(spec, dict):
+            raise ValueError("Invalid JSON spec generated")
+        report = crud.create_report(db, prompt_text=payload.prompt.strip(), json_spec=spec)
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Database error occurred")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Iteration failed: {str(e)}")
+
+    sse = format == "sse"
+    body = _iterate_events(report.id, spec, payload.max_iters, payload.early_stop, sse)
+    return StreamingResponse(body, media_type="text/event-stream" if sse else "application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/reports", response_model=ReportPage, summary="List reports, newest first (cursor paginated)")
+def list_reports(limit: int = 20, cursor: Optional[str] = None, priority: Optional[str] = None,
+                 min_score: Optional[float] = None, max_score: Optional[float] = None,
+                 db: Session = Depends(get_db)):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+    if priority is not None and priority.lower() not in {"high", "medium", "low"}:
+        raise HTTPException(status_code=400, detail="priority must be one of: high|medium|low")
+    after = decode_cursor(cursor) if cursor else None
+
     try:
-        rpt = crud.get_report(db, report_id)
+        # one extra row tells us whether another page exists
+        rows = crud.list_reports(db, limit + 1, after=after, priority=priority.lower() if priority else None,
+                                 min_score=min_score, max_score=max_score)
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1][0]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return fast_json({
+            "items": [
+                {"id": r.id, "prompt_text": r.prompt_text, "json_spec": r.json_spec,
+                 "created_at": r.created_at.isoformat(), "latest_score": score}
+                for r, score in page
+            ],
+            "next_cursor": next_cursor,
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to list reports: {str(e)}")
+
+@app.get("/reports/{report_id}", response_model=ReportOut, response_model_exclude_unset=True,
+         summary="Fetch a full report with history")
+def get_report(report_id: str, include: Optional[str] = None, exclude: Optional[str] = None,
+               if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    sections = parse_sections(include, exclude)
+    try:
+        cached = report_cache.get(report_id, sections) if report_cache else None
+        if cached:
+            body, etag = cached
+            return report_response(body, if_none_match, etag=etag)
+        generation = report_cache.generation() if report_cache else None
+        rpt = crud.get_report(db, report_id, sections=sections)
         if not rpt:
             raise HTTPException(status_code=404, detail="Report not found")
-        return {
-            "id": rpt.id,
-            "prompt_text": rpt.prompt_text,
-            "json_spec": rpt.json_spec,
-            "evaluations": [
-                {"id": e.id, "score": e.score, "comments": e.comments, "created_at": e.created_at.isoformat()}
-                for e in rpt.evaluations
-            ],
-            "iterations": [
-                {
-                    "id": it.id,
-                    "iteration_number": it.iteration_number,
-                    "before_json": it.before_json,
-                    "after_json": it.after_json,
-                    "score_before": it.score_before,
-                    "score_after": it.score_after,
-                    "feedback": it.feedback,
-                    "created_at": it.created_at.isoformat(),
-                }
-                for it in rpt.iterations
-            ],
-            "feedback_logs": [
-                {"id": f.id, "feedback": f.feedback, "created_at": f.created_at.isoformat()}
-                for f in rpt.feedback_logs
-            ],
-        }
+        body = report_body(report_to_dict(rpt, sections))
+        if report_cache:
+            report_cache.set(report_id, sections, body, generation)
+        return report_response(body, if_none_match)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch report: {str(e)}")
 
+@app.get("/export/reports", summary="Stream all reports with their histories as NDJSON")
+def export_reports(since: Optional[datetime] = None, gzip: bool = False):
+    """One JSON line per report (with evaluations, iterations and feedback
+    logs), streamed with constant memory. `since` limits the export to
+    reports created or evaluated at or after it, for incremental dumps."""
+    body = batched(report_lines(SessionLocal, since=naive_utc(since) if since else None))
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    if gzip:
+        return StreamingResponse(gzip_chunks(body), media_type="application/gzip", headers={
+            "Content-Disposition": f'attachment; filename="reports-{stamp}.ndjson.gz"'})
+    return StreamingResponse(body, media_type="application/x-ndjson", headers={
+        "Content-Disposition": f'attachment; filename="reports-{stamp}.ndjson"'})
+
 @app.post("/log-values", response_model=HIDGOut, summary="Store daily Honesty/Integrity/Discipline/Gratitude")
 def log_values(payload: HIDGIn, db: Session = Depends(get_db)):
     # Enhanced validation for meaningful HIDG values
@@ -210,7 +428,7 @@ def health_check():
         "status": "healthy",
         "version": "1.1.0",
         "message": "Prompt → JSON Agent Backend - Enhanced with RL learning and HIDG analytics",
-        "endpoints": ["/generate", "/evaluate", "/iterate", "/reports/{id}", "/log-values", "/hidg-logs", "/hidg-analytics"],
+        "endpoints": ["/generate", "/generate/batch", "/evaluate", "/evaluate/batch", "/iterate", "/iterate/stream", "/reports", "/reports/{id}", "/export/reports", "/log-values", "/hidg-logs", "/hidg-analytics", "/stats/cache", "/stats/write-behind"],
         "features": ["Comprehensive error handling", "Genuine RL learning", "HIDG analytics", "Input validation"]
     }
 
@@ -220,7 +438,7 @@ def health_check_with_db(db: Session = Depends(get_db)):
         # Test database connection and get stats
         db.execute("SELECT 1")
         report_count = db.query(models.Report).count()
-        hidg_count = db.query(models.HIDGValue).count()
+        hidg_count = crud.count_hidg_values(db)
         db_status = "connected"
     except Exception as e:
         db_status = f"disconnected: {str(e)}"
@@ -236,6 +454,25 @@ def health_check_with_db(db: Session = Depends(get_db)):
         } if "connected" in db_status else {}
     }
 
+@app.get("/stats/cache", summary="Hit/miss counters of the in-process agent caches")
+def cache_stats():
+    if not settings.CACHE_ENABLED:
+        return {"enabled": False, "learning_memory": rl.learning_memory.stats(),
+                "report_cache": report_cache.stats() if report_cache else {"enabled": False}}
+    return {
+        "enabled": True,
+        "prompt_agent": generator.cache.stats(),
+        "evaluator": evaluator.cache.stats() if settings.CACHE_EVALUATOR else {"enabled": False},
+        "learning_memory": rl.learning_memory.stats(),
+        "report_cache": report_cache.stats() if report_cache else {"enabled": False},
+    }
+
+@app.get("/stats/write-behind", summary="Queue depth and flush latency of the evaluation write-behind queue")
+def write_behind_stats():
+    if write_behind is None:
+        return {"enabled": False}
+    return write_behind.stats()
+
 @app.get("/")
 def root():
     return {
@@ -247,54 +484,85 @@ def root():
     }
 
 @app.get("/hidg-logs")
-def get_hidg_logs(limit: int = 30, db: Session = Depends(get_db)) -> dict:
+def get_hidg_logs(limit: int = 30, cursor: Optional[str] = None, db: Session = Depends(get_db)) -> dict:
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=400, detail="Limit must be between 1 and 100")
+    after = decode_cursor(cursor) if cursor else None
     
     try:
-        logs = db.query(models.HIDGValue).order_by(models.HIDGValue.created_at.desc()).limit(limit).all()
-        total_count = db.query(models.HIDGValue).count()
+        # one extra row tells us whether another page exists
+        rows = crud.list_hidg_values(db, limit + 1, after=after)
+        logs = rows[:limit]
+        next_cursor = encode_cursor(logs[-1].created_at, logs[-1].id) if len(rows) > limit else None
+        total_count = crud.count_hidg_values(db)
         
         return {
             "logs": [{"id": str(log.id), "honesty": log.honesty, "integrity": log.integrity, 
                      "discipline": log.discipline, "gratitude": log.gratitude, 
                      "created_at": log.created_at.isoformat()} for log in logs],
             "total_count": total_count,
-            "showing": len(logs)
+            "showing": len(logs),
+            "next_cursor": next_cursor
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch HIDG logs: {str(e)}")
 
+def _truncate(text: str, chars: int = 100) -> str:
+    return text[:chars] + "..." if len(text) > chars else text
+
 @app.get("/hidg-analytics")
-def get_hidg_analytics(db: Session = Depends(get_db)) -> dict:
-    """Get analytics on HIDG values for meaningful insights"""
+def get_hidg_analytics(since: Optional[datetime] = None, days: Optional[int] = None,
+                       db: Session = Depends(get_db)) -> dict:
+    """Get analytics on HIDG values for meaningful insights.
+
+    The window is all entries by default, entries at or after `since`, or
+    entries from the last `days` days.
+    """
+    if since is not None and days is not None:
+        raise HTTPException(status_code=400, detail="Use either since or days, not both")
+    if days is not None:
+        if days < 1 or days > 3650:
+            raise HTTPException(status_code=400, detail="days must be between 1 and 3650")
+        since = datetime.utcnow() - timedelta(days=days)
+    elif since is not None:
+        since = naive_utc(since)
+
     try:
-        logs = db.query(models.HIDGValue).order_by(models.HIDGValue.created_at.desc()).limit(100).all()
-        if not logs:
+        stats = crud.hidg_analytics(db, since=since)
+        total = stats["entries"]
+        if not total:
             return {"message": "No HIDG logs found", "analytics": {}}
-        
-        # Meaningful analytics
-        avg_lengths = {
-            "honesty": sum(len(log.honesty) for log in logs) / len(logs),
-            "integrity": sum(len(log.integrity) for log in logs) / len(logs),
-            "discipline": sum(len(log.discipline) for log in logs) / len(logs),
-            "gratitude": sum(len(log.gratitude) for log in logs) / len(logs)
-        }
-        
+
+        avg_lengths = stats["average_reflection_length"]
+        sample = crud.latest_hidg_sample(db, since=since)
         return {
-            "total_entries": len(logs),
-            "latest_entry": logs[0].created_at.isoformat() if logs else None,
+            "total_entries": total,
+            "window": {"since": since.isoformat() if since else None, "days": days},
+            "latest_entry": stats["latest_entry"].isoformat() if stats["latest_entry"] else None,
             "average_reflection_length": avg_lengths,
-            "consistency_score": min(len(logs) / 30, 1.0),  # Based on daily logging
+            "consistency_score": min(total / 30, 1.0),  # Based on daily logging
             "insights": {
                 "most_detailed_area": max(avg_lengths, key=avg_lengths.get),
                 "reflection_depth": "high" if sum(avg_lengths.values()) / 4 > 50 else "moderate",
-                "logging_frequency": "daily" if len(logs) >= 7 else "occasional"
+                "logging_frequency": "daily" if total >= 7 else "occasional"
             },
+            "daily": stats["daily"],
             "sample_recent": {
-                "honesty": logs[0].honesty[:100] + "..." if len(logs[0].honesty) > 100 else logs[0].honesty,
-                "gratitude": logs[0].gratitude[:100] + "..." if len(logs[0].gratitude) > 100 else logs[0].gratitude
-            } if logs else {}
+                "honesty": _truncate(sample[0]),
+                "gratitude": _truncate(sample[1])
+            } if sample else {}
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to generate analytics: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to generate analytics: {str(e)}")
+
+if settings.ASYNC_DB:
+    # Swap the sync handlers for their async versions on the same paths.
+    from fastapi.routing import APIRoute
+    from .async_api import router as async_router
+
+    _async_routes = {(r.path, m) for r in async_router.routes for m in r.methods}
+    app.router.routes = [
+        r for r in app.router.routes
+        if not (isinstance(r, APIRoute) and any((r.path, m) in _async_routes for m in r.methods))
+    ]
+    app.include_router(async_router)
@@ -1,19 +1,53 @@
 import uuid
-from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Float, Integer, ForeignKey
+from datetime import datetime, date
+from typing import Optional
+from sqlalchemy import Column, String, DateTime, Date, Float, Integer, ForeignKey, Index
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.types import JSON
+from sqlalchemy.types import JSON, TypeDecorator, Uuid
+from .config import settings
 from .database import Base
+from .ids import uuid7
+
+if settings.ID_SCHEME not in {"uuid4", "uuid7"}:
+    raise ValueError(f"Invalid ID_SCHEME: {settings.ID_SCHEME}")
+if settings.ITERATION_STORAGE not in {"inline", "dedup"}:
+    raise ValueError(f"Invalid ITERATION_STORAGE: {settings.ITERATION_STORAGE}")
 
 def gen_uuid():
+    if settings.ID_SCHEME == "uuid7":
+        return str(uuid7())
     return str(uuid.uuid4())
 
+class NativeUuid(TypeDecorator):
+    """Native 16-byte UUID column that still takes and returns strings.
+    Values that are not UUIDs bind as NULL, so a lookup by a malformed id
+    finds nothing instead of raising a database error."""
+    impl = Uuid(as_uuid=False)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            return None
+
+# Id and foreign key column type: native UUID on PostgreSQL when NATIVE_UUID
+# is on (run migrate_ids.py on existing databases first), text otherwise.
+IdType = NativeUuid if settings.NATIVE_UUID and make_url(settings.DATABASE_URL).get_backend_name() == "postgresql" else String
+
 class Report(Base):
     __tablename__ = "reports"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
+    # (created_at, id) backs keyset pagination of GET /reports
+    __table_args__ = (Index("ix_reports_created_at_id", "created_at", "id"),)
+    id: Mapped[str] = mapped_column(IdType, primary_key=True, default=gen_uuid)
     prompt_text: Mapped[str] = mapped_column(String, nullable=False)
     json_spec = Column(JSON, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # sha256 of the prompt, only set when DEDUP_REPORTS is on (NULLs never collide)
+    prompt_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, unique=True, index=True)
 
     evaluations = relationship("Evaluation", back_populates="report", cascade="all, delete-orphan")
     iterations = relationship("Iteration", back_populates="report", cascade="all, delete-orphan")
@@ -21,8 +55,10 @@ class Report(Base):
 
 class Evaluation(Base):
     __tablename__ = "evaluations"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
-    report_id: Mapped[str] = mapped_column(String, ForeignKey("reports.id"), nullable=False, index=True)
+    # latest evaluation per report, used for score filtering on GET /reports
+    __table_args__ = (Index("ix_evaluations_report_id_created_at", "report_id", "created_at"),)
+    id: Mapped[str] = mapped_column(IdType, primary_key=True, default=gen_uuid)
+    report_id: Mapped[str] = mapped_column(IdType, ForeignKey("reports.id"), nullable=False, index=True)
     score: Mapped[float] = mapped_column(Float, nullable=False)
     comments: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -31,8 +67,8 @@ class Evaluation(Base):
 
 class FeedbackLog(Base):
     __tablename__ = "feedback_logs"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
-    report_id: Mapped[str] = mapped_column(String, ForeignKey("reports.id"), nullable=False, index=True)
+    id: Mapped[str] = mapped_column(IdType, primary_key=True, default=gen_uuid)
+    report_id: Mapped[str] = mapped_column(IdType, ForeignKey("reports.id"), nullable=False, index=True)
     feedback: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
@@ -40,23 +76,66 @@ class FeedbackLog(Base):
 
 class Iteration(Base):
     __tablename__ = "iterations"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
-    report_id: Mapped[str] = mapped_column(String, ForeignKey("reports.id"), nullable=False, index=True)
+    id: Mapped[str] = mapped_column(IdType, primary_key=True, default=gen_uuid)
+    report_id: Mapped[str] = mapped_column(IdType, ForeignKey("reports.id"), nullable=False, index=True)
     iteration_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Inline specs, or JSON null when stored in spec_blobs (ITERATION_STORAGE=dedup);
+    # read them through before_spec / after_spec
     before_json = Column(JSON, nullable=False)
     after_json = Column(JSON, nullable=False)
     score_before: Mapped[float] = mapped_column(Float, nullable=False)
     score_after: Mapped[float] = mapped_column(Float, nullable=False)
     feedback: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    before_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    after_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     report = relationship("Report", back_populates="iterations")
+    before_blob = relationship("SpecBlob", primaryjoin="foreign(Iteration.before_hash) == SpecBlob.hash", viewonly=True)
+    after_blob = relationship("SpecBlob", primaryjoin="foreign(Iteration.after_hash) == SpecBlob.hash", viewonly=True)
+
+    @property
+    def before_spec(self):
+        return self.before_blob.body if self.before_hash else self.before_json
+
+    @property
+    def after_spec(self):
+        return self.after_blob.body if self.after_hash else self.after_json
+
+class SpecBlob(Base):
+    """Content-addressed spec bodies shared by iterations: a round's
+    before_json is the previous round's after_json, and many reports
+    converge on the same specs, so each distinct spec is stored once."""
+    __tablename__ = "spec_blobs"
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of canonical JSON
+    body = Column(JSON, nullable=False)
 
 class HIDGValue(Base):
     __tablename__ = "hidg_values"
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=gen_uuid)
+    # (created_at, id) backs keyset pagination of /hidg-logs
+    __table_args__ = (Index("ix_hidg_values_created_at_id", "created_at", "id"),)
+    id: Mapped[str] = mapped_column(IdType, primary_key=True, default=gen_uuid)
     honesty: Mapped[str] = mapped_column(String, nullable=False)
     integrity: Mapped[str] = mapped_column(String, nullable=False)
     discipline: Mapped[str] = mapped_column(String, nullable=False)
     gratitude: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+class HIDGDailyRollup(Base):
+    """Per-day totals of hidg_values (UTC days), maintained by crud.log_hidg.
+    Rebuild with `python backfill_hidg_rollup.py`."""
+    __tablename__ = "hidg_daily_rollups"
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    entries: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    honesty_chars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    integrity_chars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    discipline_chars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    gratitude_chars: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_entry_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+class LearningPattern(Base):
+    """RLAgent learning memory when RL_MEMORY_BACKEND=db (see DBLearningMemory)."""
+    __tablename__ = "learning_patterns"
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    changes = Column(JSON, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
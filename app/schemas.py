@@ -3,12 +3,31 @@ from pydantic import BaseModel, Field
 
 # ----- Agent I/O -----
 
+PROMPT_MAX_CHARS = 2000
+
 class PromptIn(BaseModel):
-    prompt: str = Field(..., min_length=1, max_length=2000, example="Title: Student Portal; Description: Manage courses, students, and grades; Priority: high")
+    prompt: str = Field(..., min_length=1, max_length=PROMPT_MAX_CHARS, example="Title: Student Portal; Description: Manage courses, students, and grades; Priority: high")
+
+class BatchPromptIn(BaseModel):
+    # no length constraints: /generate/batch reports them per item
+    prompt: Optional[str] = Field(None, example="design a robot using aluminium; Priority: high")
 
 class GenerateOut(BaseModel):
     id: str
     json_spec: dict
+    deduplicated: bool = False
+
+class BatchGenerateItem(BaseModel):
+    index: int
+    id: Optional[str] = None
+    json_spec: Optional[dict] = None
+    deduplicated: bool = False
+    error: Optional[str] = None
+
+class BatchGenerateOut(BaseModel):
+    results: List[BatchGenerateItem]
+    created: int
+    failed: int
 
 class EvaluateIn(BaseModel):
     report_id: Optional[str] = None
@@ -18,9 +37,31 @@ class EvaluateOut(BaseModel):
     score: float
     comments: str
 
+class EvaluateBatchIn(BaseModel):
+    # either list: stored reports are scored and their evaluations saved,
+    # inline specs are only scored
+    report_ids: List[str] = []
+    json_specs: List[dict] = []
+
+class EvaluateBatchItem(BaseModel):
+    index: int
+    report_id: Optional[str] = None
+    score: Optional[float] = None
+    comments: Optional[str] = None
+    error: Optional[str] = None
+
+class EvaluateBatchOut(BaseModel):
+    results: List[EvaluateBatchItem]
+    evaluated: int
+    failed: int
+
 class IterateIn(BaseModel):
     prompt: str
     max_iters: int = Field(default=2, ge=1, le=8)
+    # 1 = single trajectory; >1 keeps the best beam_width specs each round
+    beam_width: int = Field(default=1, ge=1, le=16)
+    # stop before max_iters once the spec converges (see IterateOut.stop_reason)
+    early_stop: bool = True
 
 class IterationRecord(BaseModel):
     iteration_number: int
@@ -33,6 +74,8 @@ class IterationRecord(BaseModel):
 class IterateOut(BaseModel):
     report_id: str
     iterations: List[IterationRecord]
+    # target_score | no_change | plateau | max_iters
+    stop_reason: str = "max_iters"
 
 # ----- HIDG -----
 
@@ -48,9 +91,20 @@ class HIDGOut(BaseModel):
 # ----- Reports -----
 
 class ReportOut(BaseModel):
+    id: str
+    prompt_text: Optional[str] = None
+    json_spec: Optional[dict] = None
+    evaluations: Optional[List[dict]] = None
+    iterations: Optional[List[dict]] = None
+    feedback_logs: Optional[List[dict]] = None
+
+class ReportSummary(BaseModel):
     id: str
     prompt_text: str
     json_spec: dict
-    evaluations: List[dict]
-    iterations: List[dict]
-    feedback_logs: List[dict]
+    created_at: str
+    latest_score: Optional[float] = None
+
+class ReportPage(BaseModel):
+    items: List[ReportSummary]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,111 @@
+"""Shaping of ORM rows into API payloads, shared by the sync and async routes."""
+from datetime import datetime, timezone
+from typing import Optional
+import base64
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from .config import settings
+from . import models, crud
+from .services.report_cache import etag_for, etag_matches
+
+if settings.FAST_JSON:
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        raise RuntimeError("FAST_JSON is enabled but orjson is not installed (pip install orjson)")
+
+def naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; convert aware query values to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def encode_cursor(created_at: datetime, report_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{report_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, report_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), report_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def fast_json(payload: dict):
+    """With FAST_JSON, return `payload` as an ORJSONResponse. FastAPI passes
+    Response objects through untouched, skipping the response_model
+    validation and the stdlib JSON encoder, so `payload` must already have
+    exactly the route model's shape (the routes build it that way)."""
+    if settings.FAST_JSON:
+        return ORJSONResponse(payload)
+    return payload
+
+def report_body(payload: dict) -> bytes:
+    """Serialized GET /reports/{id} body (orjson with FAST_JSON), as cached
+    by the report cache; `payload` comes from report_to_dict."""
+    if settings.FAST_JSON:
+        return ORJSONResponse(payload).body
+    return JSONResponse(payload).body
+
+def report_response(body: bytes, if_none_match: Optional[str], etag: Optional[str] = None) -> Response:
+    """`body` with its ETag, or 304 Not Modified when the client has it already."""
+    etag = etag or etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}  # always revalidate: reports change
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def parse_sections(include: Optional[str], exclude: Optional[str]) -> set:
+    """Resolve ?include= / ?exclude= (comma-separated) into report sections."""
+    def split(value: str) -> set:
+        names = {part.strip() for part in value.split(",") if part.strip()}
+        unknown = names - set(crud.REPORT_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown report section(s): {', '.join(sorted(unknown))}. "
+                       f"Valid: {', '.join(crud.REPORT_SECTIONS)}"
+            )
+        return names
+
+    sections = set(crud.REPORT_SECTIONS)
+    if include:
+        sections = split(include)
+        if "iterations" in sections:
+            sections.add("iteration_bodies")
+    if exclude:
+        sections -= split(exclude)
+    return sections
+
+def report_to_dict(rpt: models.Report, sections: set) -> dict:
+    out = {"id": rpt.id}
+    if "prompt_text" in sections:
+        out["prompt_text"] = rpt.prompt_text
+    if "json_spec" in sections:
+        out["json_spec"] = rpt.json_spec
+    if "evaluations" in sections:
+        out["evaluations"] = [
+            {"id": e.id, "score": e.score, "comments": e.comments, "created_at": e.created_at.isoformat()}
+            for e in rpt.evaluations
+        ]
+    if "iterations" in sections:
+        out["iterations"] = []
+        for it in rpt.iterations:
+            item = {"id": it.id, "iteration_number": it.iteration_number}
+            if "iteration_bodies" in sections:
+                item["before_json"] = it.before_spec
+                item["after_json"] = it.after_spec
+            item.update({
+                "score_before": it.score_before,
+                "score_after": it.score_after,
+                "feedback": it.feedback,
+                "created_at": it.created_at.isoformat(),
+            })
+            out["iterations"].append(item)
+    if "feedback_logs" in sections:
+        out["feedback_logs"] = [
+            {"id": f.id, "feedback": f.feedback, "created_at": f.created_at.isoformat()}
+            for f in rpt.feedback_logs
+        ]
+    return out
@@ -0,0 +1,117 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def _copy(value: Any) -> Any:
+    # Agent results are usually flat dicts of scalars, where a dict() copy is
+    # already a full copy and far cheaper than deepcopy.
+    if isinstance(value, dict) and all(isinstance(v, _SCALARS) for v in value.values()):
+        return dict(value)
+    return copy.deepcopy(value)
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU cache with an optional TTL and hit/miss counters.
+
+    Values are stored as given; callers that hand out mutable values should
+    copy them (see `CachedAgent`).
+    """
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def prompt_key(prompt: str) -> str:
+    """Cache key for PromptAgent: the prompt without surrounding whitespace."""
+    return prompt.strip()
+
+
+def spec_key(spec: Dict) -> str:
+    """Cache key for Evaluator: hash of the spec's canonical JSON form."""
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class CachedAgent:
+    """Memoizes a BHIV agent's pure `run(input)` through an LRUCache.
+
+    Results are copied on the way in and out, so a caller mutating the
+    returned value (as RLAgent does with specs) cannot poison the cache.
+    Exceptions are not cached.
+    """
+    def __init__(self, agent: Any, cache: LRUCache, key: Callable[[Any], Hashable]):
+        self.agent = agent
+        self.cache = cache
+        self.key = key
+
+    def run(self, value: Any) -> Any:
+        try:
+            k = self.key(value)
+        except Exception:
+            # unkeyable input (e.g. not a dict/str): let the agent validate it
+            return self.agent.run(value)
+        hit = self.cache.get(k, _MISSING)
+        if hit is not _MISSING:
+            return _copy(hit)
+        result = self.agent.run(value)
+        self.cache.set(k, _copy(result))
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.agent, name)
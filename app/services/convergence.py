@@ -0,0 +1,43 @@
+from typing import Optional
+
+# Reasons an improvement loop ended, as reported in IterateOut.stop_reason
+TARGET_SCORE = "target_score"
+NO_CHANGE = "no_change"
+PLATEAU = "plateau"
+MAX_ITERS = "max_iters"
+
+
+class ConvergenceMonitor:
+    """Decides when RLAgent's improvement loop can stop before max_iters.
+
+    Fed the real evaluator scores of each round (not the smoothed scores
+    stored in the history). Stops when the spec reaches `target_score`,
+    when a round leaves the spec unchanged, or when the score improved by
+    less than `epsilon` for `patience` rounds in a row. `stop_reason` says
+    which, or MAX_ITERS once the loop ran out of rounds.
+    """
+    def __init__(self, target_score: float = 1.0, epsilon: float = 0.01, patience: int = 2):
+        if patience < 1:
+            raise ValueError("patience must be at least 1")
+        self.target_score = target_score
+        self.epsilon = epsilon
+        self.patience = patience
+        self.stale_rounds = 0
+        self.stop_reason: Optional[str] = None
+
+    def update(self, score_before: float, score_after: float, changed: bool) -> bool:
+        """Record one round; returns True when the loop should stop."""
+        if score_after >= self.target_score:
+            self.stop_reason = TARGET_SCORE
+        elif not changed:
+            self.stop_reason = NO_CHANGE
+        else:
+            self.stale_rounds = self.stale_rounds + 1 if score_after - score_before < self.epsilon else 0
+            if self.stale_rounds >= self.patience:
+                self.stop_reason = PLATEAU
+        return self.stop_reason is not None
+
+    def finish(self) -> str:
+        if self.stop_reason is None:
+            self.stop_reason = MAX_ITERS
+        return self.stop_reason
@@ -1,4 +1,6 @@
-from typing import Dict
+from typing import Dict, List, Tuple
+
+_PRIORITIES = {"high", "medium", "low"}
 
 class Evaluator:
     """Heuristic evaluator that scores a JSON spec in [0, 1].
@@ -39,3 +41,35 @@ class Evaluator:
             comments.append("Spec looks good.")
 
         return {"score": round(score, 2), "comments": " ".join(comments)}
+
+    def run_batch(self, json_specs: List[Dict]) -> List[Dict]:
+        """Score many specs at once; same results as `run` on each.
+
+        The score depends only on three features (title present, description
+        length class, valid priority), so the specs are reduced to those
+        feature columns and every result is looked up from a table of the
+        twelve possible outcomes, computed once with `run` itself.
+        """
+        for i, spec in enumerate(json_specs):
+            if not isinstance(spec, dict):
+                raise ValueError(f"json_spec at index {i} must be a dictionary")
+        titles = [bool(spec.get("title", "").strip()) for spec in json_specs]
+        descs = [len(spec.get("description", "").strip()) for spec in json_specs]
+        desc_classes = [2 if n >= 20 else 1 if n else 0 for n in descs]
+        priorities = [spec.get("priority", "").strip().lower() in _PRIORITIES for spec in json_specs]
+        table = self._outcomes()
+        return [dict(table[key]) for key in zip(titles, desc_classes, priorities)]
+
+    def _outcomes(self) -> Dict[Tuple[bool, int, bool], Dict]:
+        table = getattr(self, "_outcome_table", None)
+        if table is None:
+            table = {
+                (title, desc_class, priority): self.run({
+                    "title": "t" if title else "",
+                    "description": ("", "d", "d" * 20)[desc_class],
+                    "priority": "high" if priority else "",
+                })
+                for title in (False, True) for desc_class in (0, 1, 2) for priority in (False, True)
+            }
+            self._outcome_table = table
+        return table
@@ -0,0 +1,121 @@
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+
+from .cache import LRUCache, _MISSING
+
+
+class LearningMemory:
+    """Bounded, thread-safe store of the patterns RLAgent learns, keyed by a
+    short pattern key (e.g. "42_chars") and holding the applied changes.
+
+    The default store lives in the worker process. Use `DBLearningMemory`
+    to share it across workers and keep it over restarts.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self._cache = LRUCache(maxsize)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._cache.get(key, _MISSING)
+        return default if value is _MISSING else list(value)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: List[str]) -> None:
+        self._cache.set(key, list(value))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return self._cache.stats()["size"]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {"backend": "memory", "size": stats["size"], "maxsize": stats["maxsize"],
+                "evictions": stats["evictions"]}
+
+
+class DBLearningMemory(LearningMemory):
+    """LearningMemory persisted in the learning_patterns table, so every
+    worker reads the same patterns and they survive restarts.
+
+    A per-process LRU mirror (refreshed after `refresh_seconds`) serves
+    reads and skips writes of unchanged values; the table is trimmed to the
+    `maxsize` most recently updated keys every `trim_every` inserts.
+    """
+    def __init__(self, session_factory: Callable, maxsize: int = 1024,
+                 refresh_seconds: float = 60, trim_every: int = 64):
+        from .. import models  # services stay importable without the DB layer
+
+        self._model = models.LearningPattern
+        self._session_factory = session_factory
+        self._cache = LRUCache(maxsize, ttl=refresh_seconds)
+        self.maxsize = maxsize
+        self.trim_every = trim_every
+        self._inserts = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            with self._session_factory() as db:
+                value = db.execute(select(self._model.changes).where(self._model.key == key)).scalar()
+            if value is None:
+                return default
+            self._cache.set(key, value)
+        return list(value)
+
+    def __setitem__(self, key: str, value: List[str]) -> None:
+        value = list(value)
+        if self._cache.get(key, _MISSING) == value:
+            return
+        with self._session_factory() as db:
+            row = db.get(self._model, key)
+            if row is None:
+                db.add(self._model(key=key, changes=value, updated_at=datetime.utcnow()))
+            else:
+                row.changes, row.updated_at = value, datetime.utcnow()
+            try:
+                db.commit()
+            except IntegrityError:
+                # another worker inserted the key first; take the update path
+                db.rollback()
+                db.merge(self._model(key=key, changes=value, updated_at=datetime.utcnow()))
+                db.commit()
+            if row is None:
+                self._maybe_trim(db)
+        self._cache.set(key, value)
+
+    def _maybe_trim(self, db) -> None:
+        with self._lock:
+            self._inserts += 1
+            if self._inserts % self.trim_every:
+                return
+        keep = select(self._model.key).order_by(self._model.updated_at.desc()).limit(self.maxsize)
+        db.execute(delete(self._model).where(self._model.key.not_in(keep.scalar_subquery())))
+        db.commit()
+
+    def __len__(self) -> int:
+        with self._session_factory() as db:
+            return db.execute(select(func.count()).select_from(self._model)).scalar_one()
+
+    def clear(self) -> None:
+        with self._session_factory() as db:
+            db.execute(delete(self._model))
+            db.commit()
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "db", "size": len(self), "maxsize": self.maxsize,
+                "cached": self._cache.stats()["size"]}
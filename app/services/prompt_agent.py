@@ -15,32 +15,83 @@ class PromptAgent:
         "low": "low",
         "minor": "low",
     }
+    FIELDS = ("title", "description", "priority")
 
-    def _extract_field(self, text: str, key: str) -> Union[str, None]:
-        pattern = rf"{key}\s*[:=-]\s*(.+?)(?:;|\n|$)"
-        m = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if m:
-            return m.group(1).strip()
-        return None
+    # Patterns are compiled once per class. A field is "<name> <sep> value"
+    # where the value runs to the next ';' or newline; `_field_value` finds
+    # that end with str.find instead of a lazy `.+?` regex scan.
+    _FIELD_HEADS = {f: re.compile(rf"{f}\s*[:=-]\s*", re.IGNORECASE) for f in FIELDS}
+    _WORD_PATTERNS = {w: re.compile(rf"\b{re.escape(w)}\b", re.IGNORECASE) for w in PRIORITY_WORDS}
 
-    def _infer_priority(self, text: str) -> str:
+    @staticmethod
+    def _field_value(text: str, head: re.Match) -> Union[str, None]:
+        # Mirrors `(.+?)(?:;|\n|$)` following the head: at least one char,
+        # ending at the first ';' or newline after it. If the head's trailing
+        # whitespace ran to the end of the text, the regex would backtrack
+        # one whitespace char into the value.
+        start = head.end()
+        if start == len(text):
+            return text[-1] if head.group()[-1] not in ":=-" else None
+        ends = [i for i in (text.find(";", start + 1), text.find("\n", start + 1)) if i >= 0]
+        return text[start:min(ends) if ends else len(text)]
+
+    def _extract_field(self, text: str, key: str, folded: Union[str, None]) -> Union[str, None]:
+        """First value of `key`, as `re.search` over the whole text would find it.
+
+        `folded` is the lowercased text when the prompt is ASCII; candidate
+        positions are then located with str.find rather than the regex engine.
+        """
+        head = self._FIELD_HEADS[key]
+        pos = 0
+        while True:
+            if folded is not None:
+                pos = folded.find(key, pos)
+                if pos < 0:
+                    return None
+                m = head.match(text, pos)
+            else:
+                m = head.search(text, pos)
+                if not m:
+                    return None
+                pos = m.start()
+            value = self._field_value(text, m) if m else None
+            if value is not None:
+                return value.strip()
+            pos += 1
+
+    def _has_word(self, text: str, word: str, folded: Union[str, None]) -> bool:
+        if folded is None:
+            return self._WORD_PATTERNS[word].search(text) is not None
+        pos = folded.find(word)
+        while pos >= 0:
+            end = pos + len(word)
+            if (pos == 0 or not (folded[pos - 1].isalnum() or folded[pos - 1] == "_")) and \
+                    (end == len(folded) or not (folded[end].isalnum() or folded[end] == "_")):
+                return True
+            pos = folded.find(word, pos + 1)
+        return False
+
+    def _infer_priority(self, text: str, folded: Union[str, None]) -> str:
         # look for explicit priority
-        p = self._extract_field(text, "priority")
+        p = self._extract_field(text, "priority", folded)
         if p:
             p = p.lower().strip()
             return "high" if "high" in p else "medium" if "med" in p else "low" if "low" in p else "medium"
         # infer from words
         for word, level in self.PRIORITY_WORDS.items():
-            if re.search(rf"\b{re.escape(word)}\b", text, re.IGNORECASE):
+            if self._has_word(text, word, folded):
                 return level
         return "medium"
 
     def run(self, prompt: str) -> Dict:
         if not prompt or not prompt.strip():
             raise ValueError("Prompt cannot be empty")
-        
-        title = self._extract_field(prompt, "title")
-        desc = self._extract_field(prompt, "description")
+
+        # ASCII text lowercases without changing length, so offsets found in
+        # the folded copy are valid in the prompt itself.
+        folded = prompt.lower() if prompt.isascii() else None
+        title = self._extract_field(prompt, "title", folded)
+        desc = self._extract_field(prompt, "description", folded)
 
         if not title and not desc:
             # Best effort: use the whole prompt as title/description
@@ -54,7 +105,7 @@ class PromptAgent:
         if not desc:
             desc = title
 
-        priority = self._infer_priority(prompt)
+        priority = self._infer_priority(prompt, folded)
 
         return {
             "title": title,
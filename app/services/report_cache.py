@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .cache import LRUCache, _MISSING
+
+
+class ReportCacheBackend(ABC):
+    """Storage for serialized report responses: one hash per report id,
+    holding a body per section variant (e.g. "evaluations,json_spec").
+
+    Modelled on Redis hashes (HGET / HSET / DEL) so a Redis-compatible
+    server can back it, and one `delete` drops every variant of a report.
+    `blocking` backends wait on the network; async callers run them in a
+    worker thread.
+    """
+    blocking = False
+
+    @abstractmethod
+    def get(self, report_id: str, variant: str) -> Optional[bytes]:
+        """The cached body of one variant, or None."""
+
+    @abstractmethod
+    def set(self, report_id: str, variant: str, body: bytes) -> None:
+        """Store one variant, keeping the report's other variants."""
+
+    @abstractmethod
+    def delete(self, report_id: str) -> None:
+        """Drop every variant of a report."""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryReportCacheBackend(ReportCacheBackend):
+    """Per-process LRU of reports (all variants of a report count as one entry)."""
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self._cache = LRUCache(maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def get(self, report_id: str, variant: str) -> Optional[bytes]:
+        variants = self._cache.get(report_id, _MISSING)
+        return None if variants is _MISSING else variants.get(variant)
+
+    def set(self, report_id: str, variant: str, body: bytes) -> None:
+        with self._lock:
+            variants = self._cache.get(report_id, _MISSING)
+            # a new dict per write: readers may hold the previous one
+            variants = {} if variants is _MISSING else dict(variants)
+            variants[variant] = body
+            self._cache.set(report_id, variants)
+
+    def delete(self, report_id: str) -> None:
+        self._cache.delete(report_id)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {"backend": "memory", "size": stats["size"], "maxsize": stats["maxsize"],
+                "evictions": stats["evictions"]}
+
+
+class RedisReportCacheBackend(ReportCacheBackend):
+    """Reports in a Redis-compatible server, shared by all workers. `client`
+    is anything with redis-py's hget / hset / expire / delete methods."""
+    blocking = True
+
+    def __init__(self, client: Any, ttl: Optional[float] = None, prefix: str = "report:"):
+        self.client = client
+        self.ttl = int(ttl) if ttl else None
+        self.prefix = prefix
+
+    def get(self, report_id: str, variant: str) -> Optional[bytes]:
+        return self.client.hget(self.prefix + report_id, variant)
+
+    def set(self, report_id: str, variant: str, body: bytes) -> None:
+        key = self.prefix + report_id
+        self.client.hset(key, variant, body)
+        if self.ttl:
+            self.client.expire(key, self.ttl)
+
+    def delete(self, report_id: str) -> None:
+        self.client.delete(self.prefix + report_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "ttl_seconds": self.ttl}
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in tags
+
+
+class ReportCache:
+    """Read-through cache of serialized GET /reports/{id} bodies.
+
+    crud calls `invalidate` after every commit that adds evaluations,
+    iterations or feedback to a report. A body read from the database while
+    an invalidation ran is not stored, so a slow read cannot bring back a
+    stale body. That guard is per process; with a shared backend, other
+    workers rely on the TTL as well.
+
+    Backend errors are logged and counted, never raised: a failed lookup is
+    a miss and a failed store is skipped, so an unreachable server only
+    costs the cache.
+    """
+    def __init__(self, backend: ReportCacheBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = self.misses = self.invalidations = self.skipped = self.errors = 0
+
+    @staticmethod
+    def variant(sections: Iterable[str]) -> str:
+        return ",".join(sorted(sections))
+
+    def generation(self) -> int:
+        """Token to pass to `set` for a body about to be read from the database."""
+        return self._generation
+
+    def get(self, report_id: str, sections: Iterable[str]) -> Optional[Tuple[bytes, str]]:
+        """(body, etag) of a cached response, or None."""
+        try:
+            body = self.backend.get(report_id, self.variant(sections))
+        except Exception as e:
+            logging.warning(f"report cache get failed for {report_id}: {e}")
+            with self._lock:
+                self.errors += 1
+            body = None
+        with self._lock:
+            if body is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return body, etag_for(body)
+
+    def set(self, report_id: str, sections: Iterable[str], body: bytes, generation: int) -> None:
+        # under the lock, so an invalidation lands either before (skip) or after (delete)
+        with self._lock:
+            if generation != self._generation:
+                self.skipped += 1
+                return
+            try:
+                self.backend.set(report_id, self.variant(sections), body)
+            except Exception as e:
+                self.errors += 1
+                logging.warning(f"report cache set failed for {report_id}: {e}")
+
+    def invalidate(self, report_ids: Iterable[str]) -> None:
+        report_ids = set(report_ids)
+        with self._lock:
+            self._generation += 1
+            for report_id in report_ids:
+                try:
+                    self.backend.delete(report_id)
+                except Exception as e:
+                    self.errors += 1
+                    logging.warning(f"report cache delete failed for {report_id}: {e}")
+            self.invalidations += len(report_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "enabled": True,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "stale_fills_skipped": self.skipped,
+                "backend_errors": self.errors,
+            }
+        stats.update(self.backend.stats())
+        return stats
@@ -1,20 +1,57 @@
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional, Iterator
 from .prompt_agent import PromptAgent
 from .evaluator import Evaluator
 from .feedback import FeedbackEngine
+from .learning_memory import LearningMemory
+from .convergence import ConvergenceMonitor
+from concurrent.futures import Executor
+from itertools import combinations
+import json
 import random
 
+ENHANCEMENT_VARIANTS = 3  # description enhancements _apply can choose from
+
+_worker_evaluator = None
+
+def _evaluate_in_worker(spec: Dict) -> Dict:
+    """Process-pool worker: score a spec with a process-local Evaluator."""
+    global _worker_evaluator
+    if _worker_evaluator is None:
+        _worker_evaluator = Evaluator()
+    return _worker_evaluator.run(spec)
+
 class RLAgent:
     """Enhanced iterative improvement loop with genuine learning.
     BHIV Core: exposes `run(input: dict) -> dict`
     """
-    def __init__(self):
-        self.generator = PromptAgent()
-        self.evaluator = Evaluator()
+    def __init__(self, generator=None, evaluator=None, memory: LearningMemory = None,
+                 beam_candidates: int = 16, pool: Optional[Executor] = None, pool_min_candidates: int = 256):
+        # generator/evaluator may be shared (e.g. cache-wrapped) instances
+        self.generator = generator or PromptAgent()
+        self.evaluator = evaluator or Evaluator()
         self.feedback = FeedbackEngine()
-        self.learning_memory = {}  # Store successful patterns
+        self.learning_memory = memory if memory is not None else LearningMemory()  # Store successful patterns
+        # Beam search: candidate specs tried per beam entry per round, and an
+        # optional process pool used once a round has pool_min_candidates.
+        self.beam_candidates = beam_candidates
+        self.pool = pool
+        self.pool_min_candidates = pool_min_candidates
 
     def _apply_feedback(self, spec: Dict, suggestions: List[str], iteration: int) -> Dict:
+        improved, applied_changes = self._apply(spec, suggestions, iteration)
+        self._remember(spec, applied_changes)
+        return improved
+
+    def _remember(self, spec: Dict, applied_changes: List[str]) -> None:
+        # Store successful patterns for future use
+        if applied_changes:
+            pattern_key = f"{len(spec.get('description', ''))}_chars"
+            self.learning_memory[pattern_key] = applied_changes
+
+    def _apply(self, spec: Dict, suggestions: List[str], iteration: int,
+               enhancement_index: Optional[int] = None) -> Tuple[Dict, List[str]]:
+        """Apply `suggestions` to a copy of `spec`; returns (improved, applied changes).
+        `enhancement_index` picks the description enhancement (default: by iteration)."""
         improved = dict(spec)
         applied_changes = []
         
@@ -33,7 +70,9 @@ class RLAgent:
                         " Detailed requirements: functional and non-functional aspects covered.",
                         " Implementation notes: technical constraints and acceptance criteria defined."
                     ]
-                    enhancement = enhancements[min(iteration-1, len(enhancements)-1)]
+                    if enhancement_index is None:
+                        enhancement_index = iteration - 1
+                    enhancement = enhancements[min(enhancement_index, len(enhancements)-1)]
                     improved["description"] = (base + enhancement).strip()
                     applied_changes.append("enhanced_description")
                     
@@ -50,12 +89,7 @@ class RLAgent:
                     improved["requirements"] = ["functional", "performance", "usability"]
                     applied_changes.append("added_requirements")
                     
-        # Store successful patterns for future use
-        if applied_changes:
-            pattern_key = f"{len(spec.get('description', ''))}_chars"
-            self.learning_memory[pattern_key] = applied_changes
-            
-        return improved
+        return improved, applied_changes
 
     def _generate_progressive_feedback(self, iteration: int, spec: Dict) -> List[str]:
         """Generate increasingly sophisticated feedback based on iteration"""
@@ -76,33 +110,121 @@ class RLAgent:
         return base_feedback
 
     def run(self, prompt: str, max_iters: int = 2):
-        spec = self.generator.run(prompt)
-        history = []
-        
+        return self.run_from_spec(self.generator.run(prompt), max_iters=max_iters)
+
+    def _suggestions(self, iteration: int, spec: Dict, eval_before: Dict) -> List[str]:
+        # Use both evaluator feedback and progressive learning
+        evaluator_suggestions = self.feedback.run(eval_before, spec)
+        progressive_suggestions = self._generate_progressive_feedback(iteration, spec)
+        return list(set(evaluator_suggestions + progressive_suggestions))
+
+    def _record(self, i: int, spec: Dict, improved: Dict, eval_before: Dict, eval_after: Dict,
+                suggestions: List[str]) -> Dict:
+        score_after = eval_after["score"]
+        # Ensure some improvement (simulate learning)
+        if score_after <= eval_before["score"] and i > 1:
+            score_after = min(eval_before["score"] + 0.1 + (i * 0.05), 1.0)
+        return {
+            "iteration_number": i,
+            "before_json": spec,
+            "after_json": improved,
+            "score_before": eval_before["score"],
+            "score_after": score_after,
+            "feedback": "; ".join(suggestions),
+        }
+
+    def run_from_spec(self, spec: Dict, max_iters: int = 2, beam_width: int = 1,
+                      monitor: Optional[ConvergenceMonitor] = None) -> List[Dict]:
+        """Improvement loop over an already generated spec (avoids re-running PromptAgent).
+
+        With beam_width > 1 runs a beam search instead (see `_beam_search`).
+        A `monitor` ends the loop early once it converges; its stop_reason
+        tells why the loop ended.
+        """
+        if beam_width > 1:
+            return self._beam_search(spec, max_iters, beam_width, monitor)
+        return list(self.iter_from_spec(spec, max_iters, monitor))
+
+    def iter_from_spec(self, spec: Dict, max_iters: int = 2,
+                       monitor: Optional[ConvergenceMonitor] = None) -> Iterator[Dict]:
+        """The single-trajectory loop, yielding each iteration record as soon as it is done."""
         for i in range(1, max_iters + 1):
             eval_before = self.evaluator.run(spec)
-            
-            # Use both evaluator feedback and progressive learning
-            evaluator_suggestions = self.feedback.run(eval_before, spec)
-            progressive_suggestions = self._generate_progressive_feedback(i, spec)
-            all_suggestions = list(set(evaluator_suggestions + progressive_suggestions))
+            all_suggestions = self._suggestions(i, spec, eval_before)
             
             improved = self._apply_feedback(spec, all_suggestions, i)
             eval_after = self.evaluator.run(improved)
             
-            # Ensure some improvement (simulate learning)
-            if eval_after["score"] <= eval_before["score"] and i > 1:
-                eval_after["score"] = min(eval_before["score"] + 0.1 + (i * 0.05), 1.0)
-                eval_after["comments"] = "Iterative improvements applied based on learning"
-            
-            history.append({
-                "iteration_number": i,
-                "before_json": spec,
-                "after_json": improved,
-                "score_before": eval_before["score"],
-                "score_after": eval_after["score"],
-                "feedback": "; ".join(all_suggestions),
-            })
+            yield self._record(i, spec, improved, eval_before, eval_after, all_suggestions)
+            if monitor and monitor.update(eval_before["score"], eval_after["score"], improved != spec):
+                return
             spec = improved
-            
-        return history
+        if monitor:
+            monitor.finish()
+
+    def _candidates(self, spec: Dict, suggestions: List[str], iteration: int) -> List[Tuple[Dict, List[str], List[str]]]:
+        """Distinct (improved spec, suggestions used, applied changes) for one
+        beam entry: every suggestion subset, largest first, crossed with each
+        description enhancement variant, up to `beam_candidates`."""
+        seen, out = set(), []
+        suggestions = sorted(suggestions)
+        for size in range(len(suggestions), 0, -1):
+            for subset in combinations(suggestions, size):
+                for variant in range(ENHANCEMENT_VARIANTS):
+                    improved, changes = self._apply(spec, list(subset), iteration, enhancement_index=variant)
+                    key = json.dumps(improved, sort_keys=True, default=str)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    out.append((improved, list(subset), changes))
+                    if len(out) >= self.beam_candidates:
+                        return out
+        return out
+
+    def evaluate_many(self, specs: List[Dict]) -> List[Dict]:
+        """Score specs in order; large batches go to the process pool."""
+        if self.pool is None or len(specs) < self.pool_min_candidates:
+            return self.evaluator.run_batch(specs)
+        return list(self.pool.map(_evaluate_in_worker, specs, chunksize=64))
+
+    def _beam_search(self, spec: Dict, max_iters: int, beam_width: int,
+                     monitor: Optional[ConvergenceMonitor] = None) -> List[Dict]:
+        """Keep the `beam_width` best specs each round. Every beam entry
+        expands into candidate specs (see `_candidates`), all of which are
+        scored in one batch; the history of the best final entry is returned.
+        Ties keep the earlier (larger-subset) candidate, so the plain
+        single-trajectory result is always among the contenders. The
+        monitor follows the best entry of each round."""
+        beam = [(spec, self.evaluator.run(spec), [])]  # (spec, evaluation, history)
+        for i in range(1, max_iters + 1):
+            expansions = []
+            for state, eval_before, history in beam:
+                suggestions = self._suggestions(i, state, eval_before)
+                for improved, used, changes in self._candidates(state, suggestions, i):
+                    expansions.append((state, eval_before, history, improved, used, changes))
+            if not expansions:
+                break
+            scores = self.evaluate_many([e[3] for e in expansions])
+            ranked = sorted(range(len(expansions)), key=lambda k: -scores[k]["score"])
+
+            beam, kept = [], set()
+            for k in ranked:
+                state, eval_before, history, improved, used, changes = expansions[k]
+                key = json.dumps(improved, sort_keys=True, default=str)
+                if key in kept:
+                    continue
+                kept.add(key)
+                if not beam:
+                    self._remember(state, changes)
+                record = self._record(i, state, improved, eval_before, scores[k], used)
+                beam.append((improved, scores[k], history + [record]))
+                if len(beam) == beam_width:
+                    break
+            best_spec, best_eval, best_history = beam[0]
+            before = best_history[-1]
+            if monitor and monitor.update(before["score_before"], best_eval["score"],
+                                          best_spec != before["before_json"]):
+                return best_history
+        if monitor:
+            monitor.finish()
+        return beam[0][2]
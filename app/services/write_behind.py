@@ -0,0 +1,189 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+_STOP = object()
+
+
+class WriteBehindFull(Exception):
+    """The queue stayed full for the whole put timeout."""
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue of Evaluation and FeedbackLog rows, drained
+    by a background thread that inserts them in batches.
+
+    A batch is flushed once `batch_size` rows are waiting or `flush_ms`
+    after its first row arrived, whichever comes first. Producers block for
+    up to `put_timeout` seconds while the queue is full (backpressure) and
+    then get `WriteBehindFull`. Row ids and created_at are assigned on
+    submit, so stored rows match the request order and time. `stop()`
+    flushes whatever is still queued.
+
+    Rows are lost if the process dies before they are flushed, and a report
+    read right after `/evaluate` may not include the new evaluation yet.
+    """
+    def __init__(self, session_factory: Callable, maxsize: int = 10000, batch_size: int = 500,
+                 flush_ms: int = 200, put_timeout: float = 5.0):
+        from .. import crud, models  # services stay importable without the DB layer
+
+        self._crud = crud
+        self._gen_id = models.gen_uuid
+        self._session_factory = session_factory
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.put_timeout = put_timeout
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)  # notified when no producer is mid-put
+        self._producers = 0
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.enqueued = self.written = self.failed = self.rejected = self.blocked = 0
+        self.flushes = 0
+        self.flush_seconds_total = self.flush_seconds_max = self.flush_seconds_last = 0.0
+
+    def start(self) -> None:
+        with self._lock:
+            self._start_locked()
+
+    def _start_locked(self) -> None:
+        if not self._closed and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Flush everything queued so far and stop the worker. Rows submitted
+        afterwards are written synchronously."""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            # producers that passed the closed check finish their put first,
+            # so every queued row is ahead of _STOP (the worker keeps draining)
+            while self._producers:
+                self._idle.wait()
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def add_evaluation(self, report_id: str, score: float, comments: str) -> None:
+        self._put(("evaluation", {"report_id": report_id, "score": score, "comments": comments}))
+
+    def add_feedback(self, report_id: str, feedback: str) -> None:
+        self._put(("feedback", {"report_id": report_id, "feedback": feedback}))
+
+    def _put(self, item: tuple) -> None:
+        kind, row = item
+        row.update(id=self._gen_id(), created_at=datetime.utcnow())
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._start_locked()
+                self._producers += 1
+        if closed:
+            self._flush([item])
+            return
+        try:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                with self._lock:
+                    self.blocked += 1
+                try:
+                    self._queue.put(item, timeout=self.put_timeout)
+                except queue.Full:
+                    with self._lock:
+                        self.rejected += 1
+                    raise WriteBehindFull(f"write-behind queue full ({self.maxsize} rows)") from None
+            with self._lock:
+                self.enqueued += 1
+        finally:
+            with self._lock:
+                self._producers -= 1
+                if not self._producers:
+                    self._idle.notify_all()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+        # stop() was called: drain what producers managed to queue meanwhile
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for i in range(0, len(rest), self.batch_size):
+            self._flush(rest[i:i + self.batch_size])
+
+    def _write(self, batch: list) -> int:
+        """Insert `batch` in one transaction. If that fails, retry each half,
+        down to single rows, so only the rows that fail on their own are
+        dropped. Returns the number of rows written."""
+        evaluations = [row for kind, row in batch if kind == "evaluation"]
+        feedback_logs = [row for kind, row in batch if kind == "feedback"]
+        try:
+            with self._session_factory() as db:
+                self._crud.add_logs_bulk(db, evaluations, feedback_logs)
+            return len(batch)
+        except Exception:
+            if len(batch) == 1:
+                kind, row = batch[0]
+                logging.exception(f"write-behind dropped {kind} {row['id']} for report {row['report_id']}")
+                return 0
+        mid = len(batch) // 2
+        return self._write(batch[:mid]) + self._write(batch[mid:])
+
+    def _flush(self, batch: list) -> None:
+        start = time.perf_counter()
+        written = self._write(batch)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.written += written
+            self.failed += len(batch) - written
+            self.flushes += 1
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_last = elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": True,
+                "running": self._thread is not None and self._thread.is_alive(),
+                "depth": self._queue.qsize(),
+                "maxsize": self.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "failed": self.failed,
+                "blocked": self.blocked,
+                "rejected": self.rejected,
+                "flushes": self.flushes,
+                "flush_ms": {
+                    "last": round(self.flush_seconds_last * 1000, 3),
+                    "avg": round(self.flush_seconds_total / self.flushes * 1000, 3) if self.flushes else 0.0,
+                    "max": round(self.flush_seconds_max * 1000, 3),
+                },
+            }
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Rebuild the hidg_daily_rollups table from hidg_values.
+
+The rollup is maintained on every /log-values call and built automatically
+when the table is first created; run this after importing or deleting HIDG
+entries outside the API. Uses DATABASE_URL like the app.
+
+    python backfill_hidg_rollup.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, init_db
+from app import models  # noqa: F401  (registers the tables for init_db)
+from app.crud import rebuild_hidg_rollup
+
+if __name__ == "__main__":
+    init_db()
+    with SessionLocal() as db:
+        days = rebuild_hidg_rollup(db)
+    print(f"Rebuilt HIDG rollup: {days} day(s)")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark id schemes: insert throughput and index size with UUIDv4 vs UUIDv7 keys.
+
+Builds reports + evaluations tables (text ids, plus native uuid ids on
+PostgreSQL) in a scratch database, inserts --rows reports with one
+evaluation each in batched transactions, and reports rows/sec overall and
+over the last 10% of inserts (where random keys hurt most), plus the size
+of every index.
+
+    python bench_ids.py --rows 200000                 # temporary SQLite files
+    python bench_ids.py --rows 10000000 --url postgresql://localhost/scratch
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import (Column, DateTime, Float, ForeignKey, MetaData, String, Table, create_engine,
+                        insert, text)
+from sqlalchemy.types import JSON, Uuid
+
+from app.ids import uuid7
+
+SCHEMES = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def build_tables(id_type) -> MetaData:
+    metadata = MetaData()
+    Table("bench_reports", metadata,
+          Column("id", id_type, primary_key=True),
+          Column("prompt_text", String, nullable=False),
+          Column("json_spec", JSON, nullable=False),
+          Column("created_at", DateTime))
+    Table("bench_evaluations", metadata,
+          Column("id", id_type, primary_key=True),
+          Column("report_id", id_type, ForeignKey("bench_reports.id"), nullable=False, index=True),
+          Column("score", Float, nullable=False),
+          Column("comments", String, nullable=False),
+          Column("created_at", DateTime))
+    return metadata
+
+
+def index_sizes(conn) -> dict:
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(
+            "SELECT name, sum(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name LIKE 'bench_%') GROUP BY name"))
+    else:
+        rows = conn.execute(text(
+            "SELECT indexrelname, pg_relation_size(indexrelid) FROM pg_stat_user_indexes "
+            "WHERE relname LIKE 'bench_%'"))
+    return {name: size for name, size in rows}
+
+
+def run(url: str, scheme: str, id_type, rows: int, batch: int) -> dict:
+    engine = create_engine(url)
+    metadata = build_tables(id_type)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    reports, evaluations = metadata.tables["bench_reports"], metadata.tables["bench_evaluations"]
+    make_id = SCHEMES[scheme]
+    spec = {"title": "Bench", "description": "Benchmark row for id scheme comparison", "priority": "high"}
+
+    tail_start = rows - rows // 10
+    tail_time = 0.0
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        now = datetime.utcnow()
+        report_ids = [str(make_id()) for _ in range(n)]
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(insert(reports), [
+                {"id": rid, "prompt_text": "bench prompt", "json_spec": spec, "created_at": now} for rid in report_ids])
+            conn.execute(insert(evaluations), [
+                {"id": str(make_id()), "report_id": rid, "score": 1.0, "comments": "ok", "created_at": now}
+                for rid in report_ids])
+        if offset >= tail_start:
+            tail_time += time.perf_counter() - t0
+    elapsed = time.perf_counter() - start
+
+    with engine.connect() as conn:
+        sizes = index_sizes(conn)
+    metadata.drop_all(engine)
+    engine.dispose()
+    return {"rows_per_sec": rows / elapsed, "tail_rows_per_sec": (rows // 10) / tail_time if tail_time else 0,
+            "index_bytes": sizes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="reports to insert (plus one evaluation each)")
+    parser.add_argument("--batch", type=int, default=10_000, help="rows per transaction")
+    parser.add_argument("--url", help="scratch database URL (default: a temporary SQLite file per run)")
+    args = parser.parse_args()
+
+    variants = [("uuid4", "text", String), ("uuid7", "text", String)]
+    if args.url and args.url.startswith("postgres"):
+        variants += [("uuid4", "uuid", Uuid(as_uuid=False)), ("uuid7", "uuid", Uuid(as_uuid=False))]
+
+    for scheme, column, id_type in variants:
+        url = args.url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-ids-'), 'bench.db')}"
+        result = run(url, scheme, id_type, args.rows, args.batch)
+        total_index = sum(result["index_bytes"].values())
+        print(f"{scheme} ({column} ids): {result['rows_per_sec']:>9,.0f} rows/sec | last 10%: "
+              f"{result['tail_rows_per_sec']:>9,.0f} rows/sec | indexes {total_index / 2**20:,.1f} MiB")
+        for name, size in sorted(result["index_bytes"].items()):
+            print(f"    {name}: {size / 2**20:,.1f} MiB")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Micro-benchmark PromptAgent extraction: per-call regexes vs the precompiled single pass"""
+
+import argparse
+import re
+import sys
+import os
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.prompt_agent import PromptAgent
+
+
+class LegacyPromptAgent(PromptAgent):
+    """The pre-compiled-engine implementation: one f-string regex per field
+    plus one re.search per priority word, kept here for comparison."""
+
+    def _extract_field(self, text, key):
+        pattern = rf"{key}\s*[:=-]\s*(.+?)(?:;|\n|$)"
+        m = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
+        if m:
+            return m.group(1).strip()
+        return None
+
+    def _legacy_priority(self, text):
+        p = self._extract_field(text, "priority")
+        if p:
+            p = p.lower().strip()
+            return "high" if "high" in p else "medium" if "med" in p else "low" if "low" in p else "medium"
+        for word, level in self.PRIORITY_WORDS.items():
+            if re.search(rf"\b{re.escape(word)}\b", text, re.IGNORECASE):
+                return level
+        return "medium"
+
+    def run(self, prompt):
+        if not prompt or not prompt.strip():
+            raise ValueError("Prompt cannot be empty")
+        title = self._extract_field(prompt, "title")
+        desc = self._extract_field(prompt, "description")
+        if not title and not desc:
+            title = prompt.strip()[:80]
+            desc = prompt.strip()
+        if not title:
+            title = desc.split(".")[0][:80]
+        if not desc:
+            desc = title
+        return {"title": title, "description": desc, "priority": self._legacy_priority(prompt)}
+
+
+SHORT_PROMPTS = [
+    "Title: Student Portal; Description: Manage courses, students, and grades; Priority: high",
+    "design a robot using aluminium; Priority: high",
+    "create a REST API for user authentication",
+    "Description: nightly batch job that re-scores the corpus. minor cleanup",
+]
+
+
+def long_prompt(n=5000):
+    filler = "The system should handle requests from many teams and keep an audit trail. "
+    body = (filler * (n // len(filler) + 1))[: n - 40]
+    return f"Title: Platform; Description: {body}; normal"
+
+
+def bench(agent, prompts, seconds):
+    number = 1
+    while True:
+        elapsed = timeit.timeit(lambda: [agent.run(p) for p in prompts], number=number)
+        if elapsed >= seconds:
+            return number * len(prompts) / elapsed
+        number *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum measuring time per case")
+    args = parser.parse_args()
+
+    legacy, current = LegacyPromptAgent(), PromptAgent()
+    cases = {
+        "short": SHORT_PROMPTS,
+        "5000-char": [long_prompt()],
+        "5000-char non-ASCII": [long_prompt().replace("audit", "audit 🤖")],
+    }
+
+    for name, prompts in cases.items():
+        for p in prompts:
+            assert legacy.run(p) == current.run(p), f"output mismatch on {name} prompt"
+        before = bench(legacy, prompts, args.seconds)
+        after = bench(current, prompts, args.seconds)
+        print(f"{name:>20}: before {before:>10,.0f} prompts/sec | after {after:>10,.0f} prompts/sec | {after / before:.2f}x")
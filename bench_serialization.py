@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Micro-benchmark response serialization: FastAPI's response_model path vs FAST_JSON (orjson, no re-validation)"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas import ReportOut, IterateOut
+
+
+def spec(i, size):
+    return {
+        "title": f"Spec {i}",
+        "description": ("Detailed requirements: functional and non-functional aspects covered. " * size)[: size * 70],
+        "priority": "high",
+        "requirements": ["functional", "performance", "usability"],
+    }
+
+
+def report_payload(iterations, size):
+    return {
+        "id": "5f0c3c1e-4a8b-4c59-9a57-0e6f5d1d2a10",
+        "prompt_text": "design a robot using aluminium; Priority: high",
+        "json_spec": spec(0, size),
+        "evaluations": [
+            {"id": f"e{i}", "score": 0.8, "comments": "Spec looks good.", "created_at": "2025-01-01T00:00:00"}
+            for i in range(iterations)
+        ],
+        "iterations": [
+            {"id": f"it{i}", "iteration_number": i + 1, "before_json": spec(i, size), "after_json": spec(i + 1, size),
+             "score_before": 0.6, "score_after": 0.8, "feedback": "Expand the description",
+             "created_at": "2025-01-01T00:00:00"}
+            for i in range(iterations)
+        ],
+        "feedback_logs": [
+            {"id": f"f{i}", "feedback": "Expand the description", "created_at": "2025-01-01T00:00:00"}
+            for i in range(iterations)
+        ],
+    }
+
+
+def iterate_payload(iterations, size):
+    return {
+        "report_id": "5f0c3c1e-4a8b-4c59-9a57-0e6f5d1d2a10",
+        "iterations": [
+            {"iteration_number": i + 1, "before_json": spec(i, size), "after_json": spec(i + 1, size),
+             "score_before": 0.6, "score_after": 0.8, "feedback": "Expand the description"}
+            for i in range(iterations)
+        ],
+        "stop_reason": "max_iters",
+    }
+
+
+async def default_path(field, payload, exclude_unset):
+    # what FastAPI does for a dict returned from a route with response_model
+    content = await serialize_response(field=field, response_content=payload,
+                                       exclude_unset=exclude_unset, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+def fast_path(payload):
+    return ORJSONResponse(payload).body
+
+
+def bench(fn, seconds):
+    number, elapsed = 0, 0.0
+    start = time.perf_counter()
+    while elapsed < seconds:
+        fn()
+        number += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / number * 1e6  # µs per response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum measuring time per case")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    cases = [
+        ("GET /reports/{id}", ReportOut, True, report_payload),
+        ("POST /iterate", IterateOut, False, iterate_payload),
+    ]
+    for name, model, exclude_unset, make in cases:
+        field = create_response_field(name="response", type_=model)
+        for iterations, size in [(2, 1), (8, 10), (10, 70)]:
+            payload = make(iterations, size)
+            body = fast_path(payload)
+            expected = loop.run_until_complete(default_path(field, payload, exclude_unset))
+            assert json.loads(expected) == json.loads(body), f"output mismatch on {name}"
+            before = bench(lambda: loop.run_until_complete(default_path(field, payload, exclude_unset)), args.seconds)
+            after = bench(lambda: fast_path(payload), args.seconds)
+            label = f"{name} ({iterations} iters, {len(body) / 1024:,.0f} KiB)"
+            print(f"{label:>40}: before {before:>9,.1f} µs | after {after:>9,.1f} µs | {before / after:.1f}x")
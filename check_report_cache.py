@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Check the report cache backends without a Redis server: RedisReportCacheBackend against
+an in-memory stub of redis-py's hget / hset / expire / delete, and ReportCache against a client that always fails"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.report_cache import (
+    ReportCache, ReportCacheBackend, MemoryReportCacheBackend, RedisReportCacheBackend, etag_for,
+)
+
+
+class StubRedis:
+    """The subset of redis.Redis the backend uses, with the same signatures
+    and return values (bytes or None for hget, counts for hset / delete)."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.ttls = {}
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key)
+
+    def hset(self, name, key, value):
+        fields = self.hashes.setdefault(name, {})
+        added = key not in fields
+        fields[key] = value
+        return int(added)
+
+    def expire(self, name, time):
+        if name not in self.hashes:
+            return False
+        self.ttls[name] = time
+        return True
+
+    def delete(self, *names):
+        removed = 0
+        for name in names:
+            removed += self.hashes.pop(name, None) is not None
+            self.ttls.pop(name, None)
+        return removed
+
+
+class DownRedis:
+    """A client whose server is unreachable."""
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            raise ConnectionError("redis down")
+        return call
+
+
+def check_redis_backend():
+    client = StubRedis()
+    backend = RedisReportCacheBackend(client, ttl=60, prefix="report:")
+    assert backend.get("r1", "json_spec") is None
+    backend.set("r1", "json_spec", b"spec")
+    backend.set("r1", "evaluations,json_spec", b"full")
+    assert backend.get("r1", "json_spec") == b"spec"
+    assert backend.get("r1", "evaluations,json_spec") == b"full"
+    assert set(client.hashes) == {"report:r1"}, "one hash per report, under the prefix"
+    assert client.ttls == {"report:r1": 60}
+    backend.delete("r1")
+    assert backend.get("r1", "json_spec") is None and backend.get("r1", "evaluations,json_spec") is None
+
+    client = StubRedis()
+    RedisReportCacheBackend(client, ttl=0).set("r1", "json_spec", b"spec")
+    assert client.ttls == {}, "ttl 0 means no expiry"
+
+
+def check_report_cache(backend):
+    cache = ReportCache(backend)
+    sections = ("json_spec", "evaluations")
+    assert cache.get("r1", sections) is None
+    cache.set("r1", sections, b"body", cache.generation())
+    assert cache.get("r1", reversed(sections)) == (b"body", etag_for(b"body")), "variant ignores section order"
+
+    stale = cache.generation()
+    cache.invalidate(["r1"])
+    assert cache.get("r1", sections) is None
+    cache.set("r1", sections, b"old body", stale)
+    assert cache.get("r1", sections) is None, "a body read before an invalidation is not stored"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"], stats["stale_fills_skipped"]) == (1, 3, 1, 1)
+    assert stats["backend_errors"] == 0
+
+
+def check_backend_errors():
+    cache = ReportCache(RedisReportCacheBackend(DownRedis(), ttl=60))
+    assert cache.get("r1", ("json_spec",)) is None, "a failed lookup is a miss"
+    cache.set("r1", ("json_spec",), b"body", cache.generation())
+    cache.invalidate(["r1", "r2"])
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["backend_errors"] == 4
+
+
+def check_abstract_backend():
+    class Incomplete(ReportCacheBackend):
+        def get(self, report_id, variant):
+            return None
+
+    try:
+        Incomplete()
+    except TypeError:
+        return
+    raise AssertionError("a backend missing set / delete must fail when built")
+
+
+if __name__ == "__main__":
+    check_redis_backend()
+    check_report_cache(RedisReportCacheBackend(StubRedis(), ttl=60))
+    check_report_cache(MemoryReportCacheBackend(16))
+    check_backend_errors()
+    check_abstract_backend()
+    print("report cache checks passed")
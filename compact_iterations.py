@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Move inline iteration snapshots into the content-addressed spec_blobs table.
+
+Iterations written before ITERATION_STORAGE=dedup was set keep full
+before/after JSON on every row. This hashes those bodies, stores each
+distinct spec once in spec_blobs and replaces the inline copies with their
+hashes, one transaction per batch, so it can be stopped and re-run. Reads
+work the same before, during and after. Uses DATABASE_URL like the app.
+
+    python compact_iterations.py
+    python compact_iterations.py --batch-size 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, init_db
+from app import crud, models  # noqa: F401  (models registers the tables for init_db)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="iterations per transaction")
+    args = parser.parse_args()
+
+    init_db()
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        converted = crud.compact_iterations(db, batch_size=args.batch_size)
+        blobs = db.query(models.SpecBlob).count()
+    print(f"Compacted {converted} iterations into {blobs} spec blobs in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Export all reports with their evaluations, iterations and feedback logs
+as NDJSON (one report per line), streaming with constant memory.
+
+Reads DATABASE_URL like the app. Same output as GET /export/reports.
+
+    python export_reports.py -o reports.ndjson
+    python export_reports.py --gzip -o reports.ndjson.gz --since 2025-01-01T00:00:00
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.export import report_lines, batched, gzip_chunks
+from app.serializers import naive_utc
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                        help="only reports created or evaluated at or after this ISO timestamp")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the output")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows fetched per database round trip")
+    args = parser.parse_args()
+
+    lines = report_lines(SessionLocal, since=naive_utc(args.since) if args.since else None,
+                         batch_size=args.batch_size)
+    count = 0
+
+    def counted(stream):
+        global count
+        for line in stream:
+            count += 1
+            yield line
+
+    chunks = batched(counted(lines))
+    if args.gzip:
+        chunks = gzip_chunks(chunks)
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    start = time.perf_counter()
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"Exported {count} reports in {elapsed:.1f}s", file=sys.stderr)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Bulk-import prompts or HIDG entries straight into the database.
+
+Reads NDJSON (one object per line) or CSV (with a header row) in streaming
+chunks. Prompt rows need a "prompt" field; PromptAgent turns each into a
+report. HIDG rows need honesty, integrity, discipline and gratitude, plus
+an optional ISO created_at. Rows are validated like the API would and
+inserted through the crud layer, one transaction per chunk. Progress in
+rows/sec goes to stderr. Uses DATABASE_URL like the app.
+
+    python import_data.py prompts prompts.ndjson
+    python import_data.py hidg hidg.csv --chunk-size 5000
+    zcat prompts.ndjson.gz | python import_data.py prompts - --format ndjson
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app import crud, models  # noqa: F401  (models registers the tables for init_db)
+from app.schemas import PROMPT_MAX_CHARS
+from app.serializers import naive_utc
+from app.services.prompt_agent import PromptAgent
+
+
+def read_rows(path: str, fmt: str):
+    """Yield (line_number, dict) from an NDJSON or CSV file ("-" = stdin)."""
+    f = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=2):
+                yield n, row
+        else:
+            for n, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield n, json.loads(line)
+                    except json.JSONDecodeError:
+                        yield n, None
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def prompt_error(row: dict):
+    if not isinstance(row, dict):
+        return "not a JSON object"
+    prompt = row.get("prompt")
+    if prompt is not None and not isinstance(prompt, str):
+        return "prompt must be a string"
+    if not (prompt or "").strip():
+        return "Prompt cannot be empty"
+    if len(prompt) > PROMPT_MAX_CHARS:
+        return f"Prompt too long (max {PROMPT_MAX_CHARS} chars)"
+    return None
+
+
+def hidg_error(row: dict):
+    if not isinstance(row, dict):
+        return "not a JSON object"
+    if row.get("created_at"):
+        try:
+            datetime.fromisoformat(row["created_at"])
+        except (TypeError, ValueError):
+            return "created_at must be an ISO timestamp"
+    for field in crud.HIDG_FIELDS:
+        value = row.get(field)
+        if value is not None and not isinstance(value, str):
+            return f"{field} must be a string"
+        value = (value or "").strip()
+        if len(value) < 10:
+            return f"{field} must be at least 10 characters"
+        if len(value) > 1000:
+            return f"{field} too long (max 1000 chars)"
+    return None
+
+
+def import_prompts(db, chunk: list, agent: PromptAgent) -> int:
+    prompts = [row["prompt"].strip() for row in chunk]
+    if not settings.DEDUP_REPORTS:
+        return len(crud.create_reports_bulk(db, [(p, agent.run(p)) for p in prompts]))
+    # with dedup on, skip prompts already stored or repeated within the chunk
+    hashes = [crud.prompt_hash(p) for p in prompts]
+    seen = set(crud.get_reports_by_prompt_hash(db, hashes))
+    items, item_hashes = [], []
+    for p, h in zip(prompts, hashes):
+        if h not in seen:
+            seen.add(h)
+            items.append((p, agent.run(p)))
+            item_hashes.append(h)
+    return len(crud.create_reports_bulk(db, items, prompt_hashes=item_hashes))
+
+
+def import_hidg(db, chunk: list) -> int:
+    entries = []
+    for row in chunk:
+        entry = {f: row[f].strip() for f in crud.HIDG_FIELDS}
+        if row.get("created_at"):
+            entry["created_at"] = naive_utc(datetime.fromisoformat(row["created_at"]))
+        entries.append(entry)
+    return crud.log_hidg_bulk(db, entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=["prompts", "hidg"])
+    parser.add_argument("path", help='NDJSON or CSV file, "-" for stdin')
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="default: from the file extension")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per transaction")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    validate = prompt_error if args.kind == "prompts" else hidg_error
+    agent = PromptAgent()
+    init_db()
+
+    rows = read_rows(args.path, fmt)
+    inserted = skipped = 0
+    start = last_report = time.perf_counter()
+    with SessionLocal() as db:
+        while True:
+            batch = list(islice(rows, args.chunk_size))
+            if not batch:
+                break
+            chunk = []
+            for n, row in batch:
+                error = validate(row)
+                if error:
+                    skipped += 1
+                    print(f"line {n}: skipped: {error}", file=sys.stderr)
+                else:
+                    chunk.append(row)
+            if args.kind == "prompts":
+                inserted += import_prompts(db, chunk, agent)
+            else:
+                inserted += import_hidg(db, chunk)
+            now = time.perf_counter()
+            if now - last_report >= 2:
+                last_report = now
+                print(f"{inserted} rows inserted, {skipped} skipped, {inserted / (now - start):.0f} rows/sec",
+                      file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    print(f"Imported {inserted} {args.kind} rows ({skipped} skipped) in {elapsed:.1f}s "
+          f"= {inserted / elapsed if elapsed else 0:.0f} rows/sec", file=sys.stderr)
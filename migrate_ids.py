@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Convert the id and report_id columns of a PostgreSQL database from text
+to the native uuid type, ahead of turning on NATIVE_UUID=true.
+
+Runs in one transaction: checks that every stored id is a valid UUID,
+drops the foreign keys to reports.id, alters the columns with
+USING col::uuid, and recreates the foreign keys. Existing UUIDv4 ids are
+kept as they are; rows created after ID_SCHEME=uuid7 is set get
+time-ordered ids. SQLite databases keep text ids (ID_SCHEME still applies).
+
+    DATABASE_URL=postgresql://... python migrate_ids.py --dry-run
+    DATABASE_URL=postgresql://... python migrate_ids.py
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import inspect, text
+
+from app.database import engine
+
+# (table, column) pairs holding report/row ids
+ID_COLUMNS = [
+    ("reports", "id"),
+    ("evaluations", "id"), ("evaluations", "report_id"),
+    ("feedback_logs", "id"), ("feedback_logs", "report_id"),
+    ("iterations", "id"), ("iterations", "report_id"),
+    ("hidg_values", "id"),
+]
+UUID_PATTERN = "^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$"
+
+
+def migration_statements(conn) -> list:
+    inspector = inspect(conn)
+    tables = {table for table, _ in ID_COLUMNS}
+    foreign_keys = [
+        (table, fk) for table in sorted(tables) if inspector.has_table(table)
+        for fk in inspector.get_foreign_keys(table) if fk["referred_table"] == "reports"
+    ]
+    statements = [f'ALTER TABLE {table} DROP CONSTRAINT "{fk["name"]}"' for table, fk in foreign_keys]
+    for table, column in ID_COLUMNS:
+        if not inspector.has_table(table):
+            continue
+        current = {c["name"]: c["type"] for c in inspector.get_columns(table)}[column]
+        if current.__visit_name__.lower() == "uuid":
+            continue
+        statements.append(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE uuid USING {column}::uuid")
+    for table, fk in foreign_keys:
+        cols = ", ".join(fk["constrained_columns"])
+        ref = ", ".join(fk["referred_columns"])
+        statements.append(f'ALTER TABLE {table} ADD CONSTRAINT "{fk["name"]}" FOREIGN KEY ({cols}) REFERENCES reports ({ref})')
+    return statements
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        sys.exit(f"Native UUID columns are PostgreSQL only; {engine.dialect.name} keeps text ids.")
+
+    with engine.begin() as conn:
+        for table, column in ID_COLUMNS:
+            if not inspect(conn).has_table(table):
+                continue
+            bad = conn.execute(text(
+                f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL AND {column}::text !~ :pattern"
+            ), {"pattern": UUID_PATTERN}).scalar_one()
+            if bad:
+                sys.exit(f"{table}.{column} has {bad} value(s) that are not UUIDs; fix them before migrating")
+
+        statements = migration_statements(conn)
+        if not statements:
+            print("Already migrated: all id columns are uuid.")
+        for statement in statements:
+            print(statement + ";")
+            if not args.dry_run:
+                conn.execute(text(statement))
+        if statements and not args.dry_run:
+            print("Done. Set NATIVE_UUID=true (and optionally ID_SCHEME=uuid7) and restart.")
@@ -1,116 +1,248 @@
 #!/usr/bin/env python3
-"""Stress test API for robust error handling and concurrent requests"""
+"""Open-loop load test for the API with latency percentiles as JSON.
 
-import requests
+Boots the app in-process on a throwaway SQLite database (default) or drives
+an already running server (--url), sends a weighted mix of requests at a
+fixed arrival rate, and reports p50/p95/p99 latency, throughput and error
+rates per endpoint. Save a run with --output and compare later runs against
+it with --baseline.
+
+    python stress_test_api.py --rate 50 --duration 30 --output baseline.json
+    python stress_test_api.py --rate 50 --duration 30 --baseline baseline.json
+    python stress_test_api.py --url http://127.0.0.1:8000 --mix generate=1,reports=3
+"""
+
+import argparse
 import json
-import concurrent.futures
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
 import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-API_BASE = "https://prompt-to-json-agent-backend-1.onrender.com"
+import requests
 
-def test_concurrent_requests():
-    """Test API under concurrent load"""
-    print("Testing concurrent requests...")
-    
-    def make_request(i):
-        try:
-            response = requests.post(f"{API_BASE}/generate", 
-                                   json={"prompt": f"test prompt {i}"}, 
-                                   timeout=10)
-            return {"id": i, "status": response.status_code, "success": response.ok}
-        except Exception as e:
-            return {"id": i, "status": "error", "error": str(e)}
-    
-    # Test 10 concurrent requests
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(make_request, i) for i in range(10)]
-        results = [future.result() for future in concurrent.futures.as_completed(futures)]
-    
-    success_count = sum(1 for r in results if r.get("success"))
-    print(f"Concurrent test: {success_count}/10 requests successful")
-    return success_count >= 8  # Allow some failures under load
-
-def test_edge_cases():
-    """Test various edge cases and malformed inputs"""
-    print("Testing edge cases...")
-    
-    edge_cases = [
-        {"name": "Unicode prompt", "data": {"prompt": "设计一个机器人 🤖"}},
-        {"name": "Very long prompt", "data": {"prompt": "design " * 1000}},
-        {"name": "Special characters", "data": {"prompt": "design@#$%^&*()_+{}|:<>?"}},
-        {"name": "SQL injection attempt", "data": {"prompt": "'; DROP TABLE reports; --"}},
-        {"name": "XSS attempt", "data": {"prompt": "<script>alert('xss')</script>"}},
-    ]
-    
-    results = []
-    for case in edge_cases:
-        try:
-            response = requests.post(f"{API_BASE}/generate", json=case["data"], timeout=10)
-            results.append({
-                "name": case["name"],
-                "status": response.status_code,
-                "handled": response.status_code in [200, 400, 422]
-            })
-        except Exception as e:
-            results.append({"name": case["name"], "status": "error", "error": str(e)})
-    
-    handled_count = sum(1 for r in results if r.get("handled"))
-    print(f"Edge cases: {handled_count}/{len(edge_cases)} properly handled")
-    return results
-
-def test_database_stress():
-    """Test database operations under stress"""
-    print("Testing database stress...")
-    
-    # Create multiple reports rapidly
-    report_ids = []
-    for i in range(5):
+DEFAULT_MIX = "generate=40,evaluate=20,iterate=10,reports=25,list=5"
+
+PROMPTS = [
+    "Title: Student Portal; Description: Manage courses, students, and grades; Priority: high",
+    "design a robot using aluminium; Priority: high",
+    "create a REST API for user authentication",
+    "build a machine learning model for image classification",
+    "Description: nightly batch job that re-scores the corpus. minor cleanup",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_in_process(db_path: str) -> str:
+    """Run the app with uvicorn in a daemon thread; returns its base URL."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config("app.main:app", host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
         try:
-            response = requests.post(f"{API_BASE}/generate", 
-                                   json={"prompt": f"stress test {i}"}, 
-                                   timeout=10)
-            if response.ok:
-                report_ids.append(response.json()["id"])
-        except Exception as e:
-            print(f"Database stress error: {e}")
-    
-    # Test retrieving all reports
-    success_count = 0
-    for report_id in report_ids:
+            if requests.get(f"{base}/health", timeout=1).ok:
+                return base
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise RuntimeError("in-process server did not start")
+
+
+class Workload:
+    """Builds requests for each endpoint kind; reuses ids created along the way."""
+
+    def __init__(self, base: str, iterate_max: int):
+        self.base = base
+        self.iterate_max = iterate_max
+        self.report_ids = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def http(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def remember(self, report_id: str):
+        with self.lock:
+            self.report_ids.append(report_id)
+
+    def any_report(self) -> str:
+        with self.lock:
+            return random.choice(self.report_ids)
+
+    def prompt(self) -> str:
+        # a unique suffix keeps most prompts distinct, like real traffic
+        return f"{random.choice(PROMPTS)} #{random.randint(0, 10**9)}"
+
+    def call(self, kind: str, timeout: float) -> requests.Response:
+        if kind == "generate":
+            r = self.http.post(f"{self.base}/generate", json={"prompt": self.prompt()}, timeout=timeout)
+            if r.ok:
+                self.remember(r.json()["id"])
+            return r
+        if kind == "evaluate":
+            return self.http.post(f"{self.base}/evaluate", json={"report_id": self.any_report()}, timeout=timeout)
+        if kind == "iterate":
+            payload = {"prompt": self.prompt(), "max_iters": random.randint(1, self.iterate_max)}
+            r = self.http.post(f"{self.base}/iterate", json=payload, timeout=timeout)
+            if r.ok:
+                self.remember(r.json()["report_id"])
+            return r
+        if kind == "reports":
+            return self.http.get(f"{self.base}/reports/{self.any_report()}", timeout=timeout)
+        if kind == "list":
+            return self.http.get(f"{self.base}/reports", params={"limit": 20}, timeout=timeout)
+        raise ValueError(f"unknown request kind: {kind}")
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = sorted(s["latency_ms"] for s in samples)
+    errors = sum(1 for s in samples if not s["ok"])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+    }
+
+
+def run(workload: Workload, mix: dict, rate: float, duration: float, poisson: bool,
+        max_in_flight: int, timeout: float) -> dict:
+    """Open loop: requests are issued on schedule whether or not earlier ones
+    have finished, and latency counts from the scheduled start so queueing
+    delay is not hidden (no coordinated omission)."""
+    kinds, weights = list(mix), list(mix.values())
+    samples, samples_lock = [], threading.Lock()
+
+    def fire(kind: str, scheduled: float):
         try:
-            response = requests.get(f"{API_BASE}/reports/{report_id}", timeout=10)
-            if response.ok:
-                success_count += 1
-        except Exception as e:
-            print(f"Report retrieval error: {e}")
-    
-    print(f"Database stress: {success_count}/{len(report_ids)} reports retrieved")
-    return success_count == len(report_ids)
+            r = workload.call(kind, timeout)
+            ok, status = r.status_code < 400, r.status_code
+        except requests.RequestException as e:
+            ok, status = False, type(e).__name__
+        sample = {"kind": kind, "ok": ok, "status": status, "latency_ms": (time.perf_counter() - scheduled) * 1000}
+        with samples_lock:
+            samples.append(sample)
+
+    start = time.perf_counter()
+    next_at = start
+    with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        while next_at - start < duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, random.choices(kinds, weights)[0], next_at)
+            next_at += random.expovariate(rate) if poisson else 1.0 / rate
+    elapsed = time.perf_counter() - start
+
+    result = {"overall": summarize(samples, elapsed), "endpoints": {}}
+    for kind in kinds:
+        result["endpoints"][kind] = summarize([s for s in samples if s["kind"] == kind], elapsed)
+    statuses = {}
+    for s in samples:
+        if not s["ok"]:
+            statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    result["error_statuses"] = statuses
+    return result
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Relative change per endpoint for throughput and latency percentiles."""
+    def delta(new, old):
+        return round((new - old) / old, 4) if old else None
+
+    diff = {}
+    for name in ["overall"] + sorted(current["endpoints"]):
+        cur = current["overall"] if name == "overall" else current["endpoints"].get(name)
+        base = baseline["overall"] if name == "overall" else baseline.get("endpoints", {}).get(name)
+        if not cur or not base:
+            continue
+        diff[name] = {
+            "throughput_rps": delta(cur["throughput_rps"], base["throughput_rps"]),
+            "error_rate": round(cur["error_rate"] - base["error_rate"], 4),
+            **{f"latency_{p}": delta(cur["latency_ms"][p], base["latency_ms"][p]) for p in ("p50", "p95", "p99")},
+        }
+    return diff
+
 
 if __name__ == "__main__":
-    print("Starting comprehensive API stress test...\n")
-    
-    # Test API health
-    try:
-        response = requests.get(f"{API_BASE}/health", timeout=10)
-        if response.ok:
-            print("API health check passed\n")
-        else:
-            print("API health check failed")
-            exit(1)
-    except Exception as e:
-        print(f"Cannot connect to API: {e}")
-        exit(1)
-    
-    # Run stress tests
-    concurrent_ok = test_concurrent_requests()
-    edge_results = test_edge_cases()
-    db_stress_ok = test_database_stress()
-    
-    print(f"\nStress Test Results:")
-    print(f"Concurrent requests: {'PASS' if concurrent_ok else 'FAIL'}")
-    print(f"Edge case handling: {'PASS' if len(edge_results) > 0 else 'FAIL'}")
-    print(f"Database stress: {'PASS' if db_stress_ok else 'FAIL'}")
-    
-    print(f"\nAPI is {'ROBUST' if all([concurrent_ok, db_stress_ok]) else 'NEEDS IMPROVEMENT'}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server; omit to boot the app in-process")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"weighted request mix (default: {DEFAULT_MIX})")
+    parser.add_argument("--rate", type=float, default=20, help="arrival rate, requests/sec")
+    parser.add_argument("--duration", type=float, default=15, help="measurement duration, seconds")
+    parser.add_argument("--arrivals", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="cap on concurrent requests")
+    parser.add_argument("--iterate-max", type=int, default=3, help="max_iters upper bound for /iterate")
+    parser.add_argument("--seed-reports", type=int, default=50, help="reports created before measuring")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1, help="random seed for a reproducible request mix")
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    if args.url:
+        base = args.url.rstrip("/")
+    else:
+        base = start_in_process(os.path.join(tempfile.mkdtemp(prefix="loadtest-"), "loadtest.db"))
+
+    workload = Workload(base, args.iterate_max)
+    for _ in range(args.seed_reports):
+        workload.call("generate", args.timeout)
+    if not workload.report_ids:
+        sys.exit(f"could not create seed reports against {base}")
+
+    result = run(workload, parse_mix(args.mix), args.rate, args.duration,
+                 args.arrivals == "poisson", args.max_in_flight, args.timeout)
+    result["config"] = {
+        "target": args.url or "in-process", "mix": parse_mix(args.mix), "rate": args.rate,
+        "duration": args.duration, "arrivals": args.arrivals, "seed": args.seed,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            result["vs_baseline"] = compare(result, json.load(f))
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)